@@ -0,0 +1,35 @@
+""" Compare the cost of the operation id schemes of Blockchain.
+
+Usage: python scripts/bench_op_ids.py [iterations]
+"""
+import sys
+import timeit
+
+from steem.blockchain import Blockchain
+
+# a typical get_ops_in_block() item
+event = {
+    'block': 20000000,
+    'trx_in_block': 12,
+    'op_in_trx': 0,
+    'virtual_op': 0,
+    'trx_id': '4b8e1c8d8cb4d1d3ac7a93f09a27c2c7f5a3b1bf',
+    'timestamp': '2018-02-19T07:16:54',
+    'op': ['vote', {
+        'voter': 'steemit',
+        'author': 'steemit',
+        'permlink': 'firstpost',
+        'weight': 10000,
+    }],
+}
+
+
+def bench(iterations):
+    for name, fn in [('sha1', Blockchain.hash_op),
+                     ('position', Blockchain.position_id)]:
+        seconds = timeit.timeit(lambda: fn(event), number=iterations)
+        print('%-10s %8.2f us/op' % (name, seconds / iterations * 1e6))
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -50,6 +50,14 @@ TEST_REQUIRED = [
     'autopep8'
 ]
 
+ASYNC_REQUIRED = [
+    'aiohttp ; python_version >= "3.6.0"',
+]
+
+FASTJSON_REQUIRED = [
+    'orjson ; python_version >= "3.6.0"',
+]
+
 BUILD_REQUIRED = [
     'twine',
     'pypandoc',
@@ -150,7 +158,9 @@ setup(
     extras_require={
         'dev': TEST_REQUIRED + BUILD_REQUIRED,
         'build': BUILD_REQUIRED,
-        'test': TEST_REQUIRED
+        'test': TEST_REQUIRED,
+        'async': ASYNC_REQUIRED,
+        'fastjson': FASTJSON_REQUIRED
     },
     tests_require=TEST_REQUIRED,
     include_package_data=True,
@@ -1,43 +1,99 @@
 import datetime
 import math
 import time
+from collections import OrderedDict
+from functools import partial
 
 from funcy.colls import walk_values, get_in
 from funcy.seqs import take
 from funcy import rpartial
 from steembase.exceptions import AccountDoesNotExistsException
+from steembase.http_client import imap_ordered
+from steembase.operationids import filterable_operations
 from toolz import dissoc
 
 from .amount import Amount
 from .blockchain import Blockchain
 from .converter import Converter
 from .instance import shared_steemd_instance
-from .utils import parse_time, json_expand
+from .utils import chunkify, parse_time, json_expand
 
 
 class Account(dict):
     """ This class allows to easily access Account data
 
-        :param str account_name: Name of the account
+        :param str account_name: Name of the account, or the raw account
+            as returned by ``get_accounts``
         :param Steemd steemd_instance: Steemd() instance to use when
             accessing a RPC
+        :param str id_scheme: How the ``_id`` of history items is computed,
+            `sha1` (default) or `position`. See ``Blockchain``.
+        :param AccountHistoryStore history_store: Read account history from
+            this local store, after fetching the items it is missing.
 
     """
 
-    def __init__(self, account_name, steemd_instance=None):
+    def __init__(self,
+                 account_name,
+                 steemd_instance=None,
+                 id_scheme='sha1',
+                 history_store=None):
         self.steemd = steemd_instance or shared_steemd_instance()
-        self.name = account_name
+        self.id_scheme = id_scheme
+        self.history_store = history_store
 
         # caches
         self._converter = None
 
-        self.refresh()
+        if isinstance(account_name, dict):
+            self.name = account_name['name']
+            self._load(account_name)
+        else:
+            self.name = account_name
+            self.refresh()
+
+    @classmethod
+    def load_many(cls,
+                  account_names,
+                  steemd_instance=None,
+                  batch_size=100,
+                  max_workers=None,
+                  **kwargs):
+        """ Load many accounts with few requests.
+
+        Names are looked up ``batch_size`` at a time with
+        ``get_accounts``, ``max_workers`` requests in parallel. Other
+        keyword arguments are passed on to ``Account``.
+
+        Returns:
+            dict: ``Account`` objects by name. Names which do not exist
+            are left out.
+
+        .. code-block:: python
+
+           accounts = Account.load_many(['steemit', 'ned'])
+           print(accounts['ned'].sp)
+
+        """
+        steemd = steemd_instance or shared_steemd_instance()
+        account_names = list(OrderedDict.fromkeys(account_names))
+        accounts = {}
+        for batch in imap_ordered(steemd.get_accounts,
+                                  chunkify(account_names, batch_size),
+                                  max_workers=max_workers or
+                                  steemd.max_workers or 10):
+            for account in batch:
+                accounts[account['name']] = cls(
+                    account, steemd_instance=steemd, **kwargs)
+        return accounts
 
     def refresh(self):
         account = self.steemd.get_account(self.name)
         if not account:
             raise AccountDoesNotExistsException
+        self._load(account)
 
+    def _load(self, account):
         # load json_metadata
         account = json_expand(account, 'json_metadata')
         super(Account, self).__init__(account)
@@ -282,86 +338,170 @@ class Account(dict):
             if stop and index > stop:
                 return
 
-            op_type, op = event['op']
-            block_props = dissoc(event, 'op')
-
-            def construct_op(account_name):
-                # verbatim output from steemd
-                if raw_output:
-                    return item
-
-                # index can change during reindexing in
-                # future hard-forks. Thus we cannot take it for granted.
-                immutable = op.copy()
-                immutable.update(block_props)
-                immutable.update({
-                    'account': account_name,
-                    'type': op_type,
-                })
-                _id = Blockchain.hash_op(immutable)
-                immutable.update({
-                    '_id': _id,
-                    'index': index,
-                })
-                return immutable
-
-            if filter_by is None:
-                yield construct_op(self.name)
+            if self._matches(event, filter_by):
+                yield self._construct_op(item, raw_output)
+
+    @staticmethod
+    def _matches(event, filter_by):
+        if filter_by is None:
+            return True
+        if type(filter_by) is list:
+            return event['op'][0] in filter_by
+        if type(filter_by) is str:
+            return event['op'][0] == filter_by
+        return False
+
+    def _construct_op(self, item, raw_output=False):
+        # verbatim output from steemd
+        if raw_output:
+            return item
+
+        index, event = item
+        op_type, op = event['op']
+
+        # index can change during reindexing in
+        # future hard-forks. Thus we cannot take it for granted.
+        immutable = op.copy()
+        immutable.update(dissoc(event, 'op'))
+        immutable.update({
+            'account': self.name,
+            'type': op_type,
+        })
+        if self.id_scheme == 'position':
+            _id = Blockchain.position_id(event, account=self.name)
+        else:
+            _id = Blockchain.hash_op(immutable)
+        immutable.update({
+            '_id': _id,
+            'index': index,
+        })
+        return immutable
+
+    def _history_page(self, page, filter_by=None, raw_output=False):
+        """ Fetch the history items with indexes ``page[0]`` to ``page[1]``
+        (inclusive), in chronological order. """
+        first, last = page
+        return list(self.get_account_history(
+            index=last,
+            limit=last - first,
+            start=first,
+            stop=last,
+            order=1,
+            filter_by=filter_by,
+            raw_output=raw_output,
+        ))
+
+    def fetch_history(self,
+                      filter_by=None,
+                      start=0,
+                      batch_size=1000,
+                      raw_output=True,
+                      max_workers=None,
+                      reverse=False):
+        """ Fetch account history from steemd, bypassing
+        ``history_store``.
+
+        Pages of ``batch_size`` items are fetched ``max_workers`` at a
+        time, and yielded in order. Yields raw ``(index, event)`` items
+        unless ``raw_output`` is False.
+
+        With ``filter_by``, nodes which support operation filters only
+        send the matching items; see ``Steemd.get_account_history()``.
+        """
+        max_index = self.virtual_op_count()
+        if not max_index:
+            return
+
+        if isinstance(filter_by, str):
+            filter_by = [filter_by]
+        if filter_by is not None and \
+                self.steemd.history_filter is not False and \
+                all(name in filterable_operations for name in filter_by):
+            items = self._filtered_history(filter_by, start, max_index,
+                                           batch_size)
+            if not reverse:
+                items = reversed(list(items))
+            for item in items:
+                yield self._construct_op(item, raw_output)
+            return
+
+        if reverse:
+            pages = ((max(i - batch_size + 1, start), i)
+                     for i in range(max_index, start - 1, -batch_size))
+        else:
+            pages = ((i, min(i + batch_size - 1, max_index))
+                     for i in range(start, max_index + 1, batch_size))
+        fetch = partial(self._history_page, filter_by=filter_by,
+                        raw_output=raw_output)
+        for page in imap_ordered(fetch, pages,
+                                 max_workers=max_workers or
+                                 self.steemd.max_workers or 10):
+            for account_history in (reversed(page) if reverse else page):
+                yield account_history
+
+    def _filtered_history(self, filter_by, start, index, batch_size):
+        """ Yield the ``filter_by`` items at or below ``index``, newest
+        first, letting the node do the filtering if it can.
+
+        Filtered pages only tell where the next one starts once they are
+        fetched, so pages are requested one at a time. If the node turns
+        out not to support filtering, the walk continues over plain
+        ranges of ``batch_size`` items.
+        """
+        limit = min(batch_size, index)
+        while index >= start:
+            page = self.steemd.get_account_history(
+                self.name, index, limit, filter_by=filter_by)
+            for item in reversed(page):
+                if item[0] < start:
+                    return
+                yield item
+            if self.steemd.history_filter:
+                if not page or len(page) < limit:
+                    return
+                index = page[0][0] - 1
+                # steemd requires index >= limit
+                limit = min(batch_size, index)
             else:
-                if type(filter_by) is list:
-                    if op_type in filter_by:
-                        yield construct_op(self.name)
+                index -= limit + 1
+                limit = min(batch_size, index)
 
-                if type(filter_by) is str:
-                    if op_type == filter_by:
-                        yield construct_op(self.name)
+    def _stored_history(self, filter_by, start, raw_output, reverse, **kwargs):
+        self.history_store.sync(self, **kwargs)
+        for item in self.history_store.items(
+                self.name, start=start, filter_by=filter_by,
+                reverse=reverse):
+            yield self._construct_op(item, raw_output)
 
     def history(self,
                 filter_by=None,
                 start=0,
                 batch_size=1000,
-                raw_output=False):
+                raw_output=False,
+                max_workers=None):
         """ Stream account history in chronological order.
-        """
-        max_index = self.virtual_op_count()
-        if not max_index:
-            return
 
-        start_index = start + batch_size
-        i = start_index
-        while i < max_index + batch_size:
-            for account_history in self.get_account_history(
-                    index=i,
-                    limit=batch_size,
-                    start=i - batch_size,
-                    stop=max_index,
-                    order=1,
-                    filter_by=filter_by,
-                    raw_output=raw_output,
-            ):
-                yield account_history
-            i += (batch_size + 1)
+        Pages of ``batch_size`` items are fetched ``max_workers`` at a
+        time, and yielded in order. With a ``history_store``, only new
+        items are fetched, and everything is read from the store.
+        """
+        if self.history_store is not None:
+            return self._stored_history(filter_by, start, raw_output, False,
+                                        batch_size=batch_size,
+                                        max_workers=max_workers)
+        return self.fetch_history(filter_by, start, batch_size, raw_output,
+                                  max_workers)
 
     def history_reverse(self,
                         filter_by=None,
                         batch_size=1000,
-                        raw_output=False):
+                        raw_output=False,
+                        max_workers=None):
         """ Stream account history in reverse chronological order.
         """
-        start_index = self.virtual_op_count()
-        if not start_index:
-            return
-
-        i = start_index
-        while i > 0:
-            if i - batch_size < 0:
-                batch_size = i
-            for account_history in self.get_account_history(
-                    index=i,
-                    limit=batch_size,
-                    order=-1,
-                    filter_by=filter_by,
-                    raw_output=raw_output,
-            ):
-                yield account_history
-            i -= (batch_size + 1)
+        if self.history_store is not None:
+            return self._stored_history(filter_by, 0, raw_output, True,
+                                        batch_size=batch_size,
+                                        max_workers=max_workers)
+        return self.fetch_history(filter_by, 0, batch_size, raw_output,
+                                  max_workers, reverse=True)
@@ -3,6 +3,34 @@ from steembase.exceptions import BlockDoesNotExistsException
 from .instance import shared_steemd_instance
 from .utils import parse_time
 
+# trx_id of virtual operations which are not caused by a transaction
+NULL_TRX_ID = '0' * 40
+
+
+def attach_virtual_ops(block, ops):
+    """ Attach virtual operations to the transactions which caused them.
+
+    Every transaction of ``block`` gets a ``virtual_operations`` list of
+    ``get_ops_in_block`` items, and so does the block itself, for virtual
+    operations which were not caused by a transaction (ie. rewards).
+    ``block`` is changed in place, and returned.
+    """
+    transactions = block.get('transactions', [])
+    trx_ids = block.get('transaction_ids', [])
+    for trx in transactions:
+        trx['virtual_operations'] = []
+    block['virtual_operations'] = []
+
+    for op in ops:
+        i = op.get('trx_in_block')
+        if op.get('trx_id', NULL_TRX_ID) != NULL_TRX_ID and \
+                0 <= i < len(transactions) and \
+                (not trx_ids or trx_ids[i] == op['trx_id']):
+            transactions[i]['virtual_operations'].append(op)
+        else:
+            block['virtual_operations'].append(op)
+    return block
+
 
 class Block(dict):
     """ Read a single block from the chain
@@ -0,0 +1,325 @@
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from bisect import bisect_right
+from collections import OrderedDict
+
+from steembase.exceptions import BlockDoesNotExistsException
+from steembase.json_codec import get_codec
+from steembase.operationids import virtual_op_names
+
+from .block import attach_virtual_ops
+
+logger = logging.getLogger(__name__)
+
+# index entries: block number, offset and length of the record
+_INDEX_ENTRY = struct.Struct('<IQI')
+
+_virtual_operations = frozenset(virtual_op_names)
+
+
+def virtual_ops(ops):
+    """ Return the virtual operations of a ``get_ops_in_block`` result. """
+    return [x for x in ops
+            if x.get('virtual_op') or x['op'][0] in _virtual_operations]
+
+
+def load_index(index_path, data_size):
+    """ Read an index file into a ``{block_num: (offset, length)}`` dict,
+    skipping entries which point past ``data_size``. """
+    offsets = {}
+    if not os.path.exists(index_path):
+        return offsets
+    with open(index_path, 'rb') as f:
+        entries = f.read()
+    usable = len(entries) - len(entries) % _INDEX_ENTRY.size
+    for pos in range(0, usable, _INDEX_ENTRY.size):
+        block_num, offset, length = _INDEX_ENTRY.unpack_from(entries, pos)
+        if offset + length <= data_size:
+            offsets[block_num] = (offset, length)
+    return offsets
+
+
+def decode_record(record, codec):
+    """ Decode a stored record; compressed records start with the zlib
+    header byte, which never starts a JSON document. """
+    if record[:1] == b'x':
+        record = zlib.decompress(record)
+    return codec.loads(bytes(record))
+
+
+class Segment(object):
+    """ An append-only data file of records, plus an index file
+    which maps block numbers to the position of their record.
+
+    Records which were written without their index entry (ie. because the
+    process died in between) are ignored, and so are index entries which
+    point past the end of the data file.
+    """
+
+    def __init__(self, data_path, index_path):
+        self.data_path = data_path
+        self.index_path = index_path
+        size = 0
+        if os.path.exists(data_path):
+            size = os.path.getsize(data_path)
+        self.offsets = load_index(index_path, size)
+        self.data = open(data_path, 'a+b')
+        self.index = open(index_path, 'ab')
+
+    def read(self, block_num):
+        if block_num not in self.offsets:
+            return None
+        offset, length = self.offsets[block_num]
+        self.data.seek(offset)
+        return self.data.read(length)
+
+    def append(self, block_num, record):
+        self.data.seek(0, os.SEEK_END)
+        offset = self.data.tell()
+        self.data.write(record)
+        self.data.flush()
+        self.index.write(_INDEX_ENTRY.pack(block_num, offset, len(record)))
+        self.index.flush()
+        self.offsets[block_num] = (offset, len(record))
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+
+class BlockArchive(object):
+    """ A local, permanent cache of irreversible blocks.
+
+    Records are stored per ``kind`` (ie. ``'blocks'`` or ``'ops'``) in
+    segment files of ``segment_size`` consecutive block numbers. Every
+    record is JSON, zlib-compressed unless ``compress_level`` is 0, and
+    is never rewritten once appended.
+
+    Only one process at a time may write to an archive. Segment files
+    are opened on first use; only the ``max_segments`` most recently used
+    ones stay open.
+
+    Args:
+        path (str): Directory of the archive. Created if missing.
+        segment_size (int): Block numbers per segment file.
+        compress_level (int): zlib compression level. 0 stores plain JSON,
+            which ``ArchiveReader.get_raw()`` can hand out without copying.
+        json_codec (str, JsonCodec): JSON codec of the records. See
+            ``steembase.json_codec``.
+        max_segments (int): Number of segments kept open, each with two
+            file descriptors.
+
+    .. code-block:: python
+
+       from steem.steemd import Steemd
+
+       s = Steemd(block_archive='/var/lib/steem/blocks')
+       s.get_block(1000)  # fetched from a node
+       s.get_block(1000)  # read from disk
+
+    """
+
+    def __init__(self,
+                 path,
+                 segment_size=100000,
+                 compress_level=6,
+                 json_codec=None,
+                 max_segments=16):
+        self.path = path
+        self.segment_size = segment_size
+        self.compress_level = compress_level
+        self.codec = get_codec(json_codec)
+        self.max_segments = max_segments
+        self.segments = OrderedDict()
+        self.lock = threading.Lock()
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def _segment(self, kind, block_num, create=False):
+        first = block_num - block_num % self.segment_size
+        key = (kind, first)
+        segment = self.segments.pop(key, None)
+        if segment is None:
+            name = os.path.join(self.path, '%s-%010d' % key)
+            if not create and not os.path.exists(name + '.idx'):
+                return None
+            segment = Segment(name + '.dat', name + '.idx')
+            while len(self.segments) >= self.max_segments:
+                self.segments.popitem(last=False)[1].close()
+        self.segments[key] = segment
+        return segment
+
+    def get(self, kind, block_num):
+        """ Return the record of ``block_num``, or ``None``. """
+        with self.lock:
+            segment = self._segment(kind, block_num)
+            record = segment and segment.read(block_num)
+        if record is None:
+            return None
+        return decode_record(record, self.codec)
+
+    def put(self, kind, block_num, data):
+        """ Store ``data`` as the record of ``block_num``, unless there
+        already is one. """
+        record = self.codec.dumps(data)
+        if self.compress_level:
+            record = zlib.compress(record, self.compress_level)
+        with self.lock:
+            segment = self._segment(kind, block_num, create=True)
+            if block_num not in segment.offsets:
+                segment.append(block_num, record)
+
+    def close(self):
+        with self.lock:
+            for segment in self.segments.values():
+                segment.close()
+            self.segments = OrderedDict()
+
+
+class MappedSegment(object):
+    """ A read-only, memory-mapped view of a ``Segment``. """
+
+    def __init__(self, data_path, index_path):
+        size = os.path.getsize(data_path)
+        self.offsets = load_index(index_path, size)
+        self.view = None
+        if size:
+            with open(data_path, 'rb') as f:
+                self.view = memoryview(
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def read(self, block_num):
+        if block_num not in self.offsets:
+            return None
+        offset, length = self.offsets[block_num]
+        return self.view[offset:offset + length]
+
+
+class ArchiveReader(object):
+    """ Read-only, memory-mapped access to a ``BlockArchive``.
+
+    Records are sliced straight out of the mapped segment files, so
+    lookups are a dict access plus decoding, and processes scanning the
+    same archive share the OS page cache instead of each keeping copies.
+    Segments are mapped on first use; only the ``max_segments`` most
+    recently used ones stay open.
+
+    It implements the parts of the ``Steemd`` interface used by
+    ``Blockchain``, so ``Blockchain(source=path)`` streams from the
+    archive instead of from RPC nodes.
+
+    Args:
+        path (str): Directory of the archive.
+        json_codec (str, JsonCodec): JSON codec of the records.
+        max_segments (int): Number of segments kept mapped.
+        block_interval (int): Reported as ``STEEM_BLOCK_INTERVAL``.
+
+    .. code-block:: python
+
+       from steem.block_archive import ArchiveReader
+
+       archive = ArchiveReader('/var/lib/steem/blocks')
+       for block in archive.iter_blocks(range(1, 100000)):
+           print(block['witness'])
+
+    """
+
+    def __init__(self, path, json_codec=None, max_segments=16,
+                 block_interval=3):
+        self.path = path
+        self.codec = get_codec(json_codec)
+        self.max_segments = max_segments
+        self.block_interval = block_interval
+        self.nodes = []
+        self.segments = OrderedDict()
+        #: first block numbers of all segments, by kind
+        self.firsts = {}
+        for name in os.listdir(path):
+            kind, _, rest = name.rpartition('-')
+            if kind and rest.endswith('.idx'):
+                self.firsts.setdefault(kind, []).append(int(rest[:-4]))
+        for firsts in self.firsts.values():
+            firsts.sort()
+
+    def _segment(self, kind, block_num):
+        firsts = self.firsts.get(kind, [])
+        i = bisect_right(firsts, block_num) - 1
+        if i < 0:
+            return None
+        key = (kind, firsts[i])
+        segment = self.segments.pop(key, None)
+        if segment is None:
+            name = os.path.join(self.path, '%s-%010d' % key)
+            segment = MappedSegment(name + '.dat', name + '.idx')
+            while len(self.segments) >= self.max_segments:
+                # mappings are released once no slice refers to them
+                self.segments.popitem(last=False)
+        self.segments[key] = segment
+        return segment
+
+    def get_raw(self, kind, block_num):
+        """ Return the stored record of ``block_num`` as a ``memoryview``
+        of the mapped file, or ``None``. Records are JSON, or zlib
+        compressed JSON if they start with ``b'x'``. """
+        segment = self._segment(kind, block_num)
+        return segment.read(block_num) if segment else None
+
+    def get(self, kind, block_num):
+        """ Return the decoded record of ``block_num``, or ``None``. """
+        record = self.get_raw(kind, block_num)
+        if record is None:
+            return None
+        return decode_record(record, self.codec)
+
+    def _require(self, kind, block_num):
+        data = self.get(kind, block_num)
+        if data is None:
+            raise BlockDoesNotExistsException(
+                'Block %s is not archived' % block_num)
+        return data
+
+    def head_block(self):
+        """ The highest block number in the archive. """
+        heads = [0]
+        for kind, firsts in self.firsts.items():
+            for first in reversed(firsts):
+                segment = self._segment(kind, first)
+                if segment.offsets:
+                    heads.append(max(segment.offsets))
+                    break
+        return max(heads)
+
+    def get_block(self, block_num):
+        return self.get('blocks', block_num)
+
+    def get_ops_in_block(self, block_num, virtual_only):
+        ops = self.get('ops', block_num)
+        if ops is not None and virtual_only:
+            return virtual_ops(ops)
+        return ops
+
+    def iter_blocks(self, block_nums, with_virtual_ops=False, **kwargs):
+        for block_num in block_nums:
+            block = self._require('blocks', block_num)
+            block['block_num'] = block_num
+            if with_virtual_ops:
+                attach_virtual_ops(
+                    block, virtual_ops(self._require('ops', block_num)))
+            yield block
+
+    def iter_ops_in_blocks(self, block_nums, virtual_only=False, **kwargs):
+        for block_num in block_nums:
+            ops = self._require('ops', block_num)
+            yield virtual_ops(ops) if virtual_only else ops
+
+    def get_dynamic_global_properties(self):
+        head_block = self.head_block()
+        return {'head_block_number': head_block,
+                'last_irreversible_block_num': head_block}
+
+    def get_config(self):
+        return {'STEEM_BLOCK_INTERVAL': self.block_interval}
@@ -1,15 +1,111 @@
+import calendar
+import concurrent.futures
 import hashlib
 import json
+import multiprocessing
 import time
 import warnings
+from collections import deque
 
+from .block_archive import ArchiveReader
+from .checkpoint import SqliteCheckpointStore
 from .instance import shared_steemd_instance, stm
 from .utils import parse_time, compat_bytes
+from steembase.exceptions import ForkTooDeepException
+from steembase.http_client import imap_ordered, imap_unordered
+from steembase.operationids import virtual_op_names
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+virtual_operations = frozenset(virtual_op_names)
+
+#: stream_head() event of a block which became part of the chain
+APPLY = 'apply'
+#: stream_head() event of a block which was reorganized away
+ROLLBACK = 'rollback'
+
+# Steemd instance (or archive reader) of a history_parallel() worker
+# process, and the nodes (or archive path) it was made for
+_worker_steemd = None
+_worker_source = None
+
+
+def _replay_shard(task):
+    """ Fetch and parse the operations of one shard of blocks. Runs in a
+    worker process, with a Steemd instance of its own. """
+    global _worker_steemd, _worker_source
+    source, mode, id_scheme, shard, filter_by, raw_output = task
+    if _worker_steemd is None or _worker_source != source:
+        if isinstance(source, list):
+            _worker_steemd = stm.steemd.Steemd(nodes=source)
+        else:
+            _worker_steemd = ArchiveReader(source)
+        _worker_source = source
+    blockchain = Blockchain(steemd_instance=_worker_steemd, mode=mode,
+                            id_scheme=id_scheme)
+    return list(blockchain.history(
+        filter_by=filter_by,
+        start_block=shard[0],
+        end_block=shard[1] - 1,
+        raw_output=raw_output))
+
+
+class BlockTimer(object):
+    """ Tells block streams how long to wait for the next block.
+
+    The next block is due ``block_interval`` seconds after the timestamp
+    of the head block. Instead of sleeping a full interval after every
+    poll, streams sleep until just after that moment. Only when the
+    block is overdue (the node is behind, or a witness missed its slot)
+    the delay backs off exponentially from ``margin`` up to
+    ``block_interval``.
+
+    The local clock is matched to block timestamps by the smallest delay
+    observed between a block's timestamp and the moment it was first
+    seen, so clock skew does not matter.
+
+    Args:
+        block_interval (float): Seconds between blocks.
+        margin (float): Seconds to wait after a block is due.
+
+    """
+
+    def __init__(self, block_interval=3, margin=0.2):
+        self.block_interval = block_interval
+        self.margin = margin
+        self.head_block = None
+        self.due = None
+        self.misses = 0
+        self.offsets = deque(maxlen=20)
+
+    def update(self, props):
+        """ Feed in ``get_dynamic_global_properties()`` results. """
+        head_block = props.get('head_block_number')
+        if head_block is None or 'time' not in props:
+            return
+        if head_block == self.head_block:
+            self.misses += 1
+            return
+        timestamp = calendar.timegm(parse_time(props['time']).timetuple())
+        self.offsets.append(time.time() - timestamp)
+        self.head_block = head_block
+        self.due = timestamp + self.block_interval
+        self.misses = 0
+
+    def delay(self):
+        """ Seconds to wait before polling again. """
+        if self.due is None:
+            return self.block_interval
+        wait = self.due + min(self.offsets) + self.margin - time.time()
+        if wait > 0:
+            return wait
+        return min(self.block_interval, self.margin * 2 ** self.misses)
+
+    def sleep(self):
+        time.sleep(self.delay())
+
 
 class Blockchain(object):
     """ Access the blockchain and read data from it.
@@ -17,10 +113,37 @@ class Blockchain(object):
     Args:
         steemd_instance (Steemd): Steemd() instance to use when accessing a RPC
         mode (str): `irreversible` or `head`. `irreversible` is default.
+        id_scheme (str): How the ``_id`` of operations is computed.
+            `sha1` (default) hashes the whole operation, see ``hash_op()``.
+            `position` is much cheaper, see ``position_id()``.
+        source (str): Path of a ``BlockArchive`` to read blocks and
+            operations from, instead of from steemd. Streams end at the
+            last archived block.
+
+    .. code-block:: python
+
+       b = Blockchain(source='/var/lib/steem/blocks')
+       votes = b.history_parallel(['vote'], 1, 10000000, ordered=False)
     """
 
-    def __init__(self, steemd_instance=None, mode="irreversible"):
-        self.steem = steemd_instance or shared_steemd_instance()
+    def __init__(self,
+                 steemd_instance=None,
+                 mode="irreversible",
+                 id_scheme="sha1",
+                 source=None):
+        self.source = source
+        if source:
+            self.steem = ArchiveReader(source)
+        else:
+            self.steem = steemd_instance or shared_steemd_instance()
+
+        if id_scheme == "sha1":
+            self.op_id = self.hash_op
+        elif id_scheme == "position":
+            self.op_id = self.position_id
+        else:
+            raise ValueError("invalid value for 'id_scheme'!")
+        self.id_scheme = id_scheme
 
         if mode == "irreversible":
             self.mode = 'last_irreversible_block_num'
@@ -52,6 +175,9 @@ class Blockchain(object):
                     end_block=None,
                     batch_operations=False,
                     full_blocks=False,
+                    prefetch=500,
+                    virtual_only=False,
+                    with_virtual_ops=False,
                     **kwargs):
         """ This call yields raw blocks or operations depending on
         ``full_blocks`` param.
@@ -61,6 +187,10 @@ class Blockchain(object):
         all operations for each block with ``batch_operations=True``.
         You can also yield full blocks instead, with ``full_blocks=True``.
 
+        While behind the current block, up to ``prefetch`` blocks are
+        fetched ahead concurrently (in batched requests), and yielded in
+        order. Once the stream caught up, it keeps following new blocks.
+
         Args: start_block (int): Block to start with. If not provided, current
         (head) block is used.
 
@@ -72,7 +202,19 @@ class Blockchain(object):
 
         full_blocks (bool): (Defaults to False) Rather than yielding
         operations, return raw, unedited blocks as provided by steemd. This
-        mode will NOT include virtual operations.
+        mode will NOT include virtual operations, unless
+        ``with_virtual_ops=True``.
+
+        prefetch (int): (Defaults to 500) Number of blocks fetched ahead
+        while catching up. Set to 1 to fetch blocks one at a time.
+
+        virtual_only (bool): (Defaults to False) Only yield virtual
+        operations. Ignored with ``full_blocks=True``.
+
+        with_virtual_ops (bool): (Defaults to False) With
+        ``full_blocks=True``, fetch the virtual operations of every block
+        along with it, and attach them to the transactions which caused
+        them. See ``steem.block.attach_virtual_ops()``.
 
        """
 
@@ -82,26 +224,152 @@ class Blockchain(object):
 
         if not start_block:
             start_block = self.get_current_block_num()
+        if not end_block and self.source:
+            end_block = self.get_current_block_num()
 
+        timer = BlockTimer(block_interval)
         while True:
-            head_block = self.get_current_block_num()
-
-            for block_num in range(start_block, head_block + 1):
-                if end_block and block_num > end_block:
-                    raise StopIteration(
-                        "Reached stop block at: #%s" % end_block)
-
-                if full_blocks:
-                    yield self.steem.get_block(block_num)
-                elif batch_operations:
-                    yield self.steem.get_ops_in_block(block_num, False)
+            props = self.info()
+            timer.update(props)
+            head_block = props.get(self.mode)
+            if end_block:
+                head_block = min(head_block, end_block)
+
+            for result in self._prefetch(
+                    range(start_block, head_block + 1), full_blocks,
+                    prefetch, virtual_only, with_virtual_ops):
+                if full_blocks or batch_operations:
+                    yield result
                 else:
-                    for ops in self.steem.get_ops_in_block(block_num, False):
+                    for ops in result:
                         yield ops
 
-            # next round
-            start_block = head_block + 1
-            time.sleep(block_interval)
+            if end_block and head_block >= end_block:
+                return
+
+            # next round; only wait if there was nothing new
+            if head_block < start_block:
+                timer.sleep()
+            start_block = max(start_block, head_block + 1)
+
+    def _prefetch(self, block_nums, full_blocks=False, prefetch=500,
+                  virtual_only=False, with_virtual_ops=False):
+        """ Fetch blocks or their operations, ``prefetch`` blocks ahead. """
+        batch_size = max(1, min(50, prefetch))
+        window = max(1, prefetch // batch_size)
+        if full_blocks:
+            return self.steem.iter_blocks(
+                block_nums, batch_size=batch_size, window=window,
+                with_virtual_ops=with_virtual_ops)
+        return self.steem.iter_ops_in_blocks(
+            block_nums, virtual_only=virtual_only, batch_size=batch_size,
+            window=window)
+
+    def stream_head(self,
+                    start_block=None,
+                    end_block=None,
+                    max_fork_depth=100,
+                    prefetch=500):
+        """ Yield blocks up to the head block, and tell when some of them
+        were reorganized away by a fork.
+
+        This generator yields ``(event, block)`` tuples. ``APPLY`` events
+        carry the next block of the chain. When a fork switched the node
+        to another branch, every block of the abandoned branch is yielded
+        again as a ``ROLLBACK`` event, newest first, followed by ``APPLY``
+        events for the blocks of the new branch.
+
+        Blocks up to the last irreversible block are prefetched like in
+        ``stream_from()``; blocks above it are fetched one by one, and
+        checked to link up with the block before them.
+
+        Args:
+            start_block (int): Block to start with. Defaults to the head
+                block.
+            end_block (int): Stop after this block. Runs forever if not
+                provided.
+            max_fork_depth (int): How many of the latest blocks are kept to
+                find the common ancestor of two branches. If a fork is
+                deeper than that, ``ForkTooDeepException`` is raised.
+            prefetch (int): Number of blocks fetched ahead while catching
+                up to the last irreversible block.
+
+        .. code-block:: python
+
+           from steem.blockchain import Blockchain, APPLY
+
+           for event, block in Blockchain(mode='head').stream_head():
+               if event == APPLY:
+                   apply(block)
+               else:
+                   undo(block)
+        """
+        block_interval = self.config().get("STEEM_BLOCK_INTERVAL")
+
+        if not start_block:
+            start_block = self.info()['head_block_number']
+
+        # latest applied blocks, oldest first
+        applied = deque(maxlen=max_fork_depth)
+        block_num = start_block
+        timer = BlockTimer(block_interval)
+        while True:
+            props = self.info()
+            timer.update(props)
+            head_block = props['head_block_number']
+            if end_block:
+                head_block = min(head_block, end_block)
+
+            forked = False
+            for block in self._head_blocks(
+                    block_num, props['last_irreversible_block_num'],
+                    head_block, prefetch):
+                if applied and block['previous'] != applied[-1]['block_id']:
+                    for orphan in self._rollback(applied):
+                        yield ROLLBACK, orphan
+                    block_num = applied[-1]['block_num'] + 1
+                    forked = True
+                    break
+                applied.append(block)
+                block_num += 1
+                yield APPLY, block
+
+            if end_block and block_num > end_block:
+                return
+            # caught up, or the node could not serve a block it announced
+            # yet; either way, polling again right away would spin
+            if not forked:
+                timer.sleep()
+
+    def _head_blocks(self, start_block, irreversible_block, head_block,
+                     prefetch):
+        """ Blocks from ``start_block`` to ``head_block``; ends early if a
+        block above ``irreversible_block`` is not available (yet). """
+        last_prefetched = min(irreversible_block, head_block)
+        if start_block <= last_prefetched:
+            for block in self._prefetch(
+                    range(start_block, last_prefetched + 1), True, prefetch):
+                yield block
+            start_block = last_prefetched + 1
+        for block_num in range(start_block, head_block + 1):
+            block = self.steem.get_block(block_num)
+            if not block:
+                return
+            block['block_num'] = block_num
+            yield block
+
+    def _rollback(self, applied):
+        """ Pop and return blocks off ``applied`` which are not part of the
+        current chain anymore. """
+        while applied:
+            block = applied[-1]
+            current = self.steem.get_block(block['block_num'])
+            if current and current['block_id'] == block['block_id']:
+                return
+            applied.pop()
+            yield block
+        raise ForkTooDeepException(
+            'No common ancestor within the last blocks')
 
     def reliable_stream(self,
                         start_block=None,
@@ -161,10 +429,9 @@ class Blockchain(object):
                     return _client.call(_method, *_args, api=_api)
                 except Exception as e:
                     logger.error(
-                        'Error: %s' % str(s),
+                        'Error: %s' % str(e),
                         extra=dict(
                             exc=e,
-                            response=retval,
                             api_name=_api,
                             api_method=_method,
                             api_args=_args))
@@ -174,17 +441,20 @@ class Blockchain(object):
             return reliable_query(_client, 'get_config',
                                   'database_api').get('STEEM_BLOCK_INTERVAL')
 
-        def get_reliable_current_block(_client):
+        def get_reliable_props(_client):
             return reliable_query(_client, 'get_dynamic_global_properties',
-                                  'database_api').get(self.mode)
+                                  'database_api')
+
+        def get_reliable_current_block(_client):
+            return get_reliable_props(_client).get(self.mode)
 
         def get_reliable_blockdata(_client, _block_num):
             return reliable_query(_client, 'get_block', 'database_api',
-                                  block_num)
+                                  _block_num)
 
         def get_reliable_ops_in_block(_client, _block_num):
             return reliable_query(_client, 'get_ops_in_block', 'database_api',
-                                  block_num, False)
+                                  _block_num, False)
 
         if timeout is None:
             if block_interval is None:
@@ -200,64 +470,149 @@ class Blockchain(object):
         if start_block is None:
             start_block = get_reliable_current_block(_reliable_client)
 
+        timer = BlockTimer(block_interval)
         while True:
-            sleep_interval = block_interval / 4
-            head_block = get_reliable_current_block(_reliable_client)
+            props = get_reliable_props(_reliable_client)
+            timer.update(props)
+            head_block = props.get(self.mode)
 
             for block_num in range(start_block, head_block + 1):
                 if full_blocks:
-                    yield get_reliable_current_block(_reliable_client,
-                                                     head_block)
+                    yield get_reliable_blockdata(_reliable_client, block_num)
                 elif batch_operations:
                     yield get_reliable_ops_in_block(_reliable_client,
-                                                    head_block)
+                                                    block_num)
                 else:
                     for reliable_ops in get_reliable_ops_in_block(
-                            _reliable_client, head_block):
+                            _reliable_client, block_num):
                         yield reliable_ops
 
-                sleep_interval = sleep_interval / 2
-
-            time.sleep(sleep_interval)
-            start_block = head_block + 1
+            if head_block < start_block:
+                timer.sleep()
+            start_block = max(start_block, head_block + 1)
 
     def stream(self, filter_by=list(), *args, **kwargs):
         """ Yield a stream of operations, starting with current head block.
 
             Args:
-                filter_by (str, list): List of operations to filter for
+                filter_by (str, list): List of operations to filter for.
+                    If these are all virtual operations, steemd is asked
+                    for virtual operations only.
+                checkpoint (str): Name under which the position of the
+                    stream is saved. If the stream was saved before, it
+                    resumes right after the last processed operation,
+                    ignoring ``start_block``. Positions of a stream of
+                    virtual operations only can not be resumed with a
+                    filter including other operations, and vice versa.
+                checkpoint_store (CheckpointStore): Where to save the
+                    position. Defaults to ``SqliteCheckpointStore()``.
+                checkpoint_interval (int): Save the position every this
+                    many operations (default 100), and when the stream is
+                    closed.
+
+            An operation counts as processed once the next one is
+            requested. Delivery is at-least-once: after a crash, up to
+            ``checkpoint_interval`` operations are delivered again.
+            Use ``_id`` (or ``op_id(event)`` of raw operations) to detect
+            these duplicates.
+
+            .. code-block:: python
+
+               for op in Blockchain().stream(['vote'], checkpoint='votes'):
+                   process(op)
         """
         if isinstance(filter_by, str):
             filter_by = [filter_by]
-
-        for ops in self.stream_from(*args, **kwargs):
-
-            # deal with different self.stream_from() outputs
-            events = ops
-            if type(ops) == dict:
-                if 'witness_signature' in ops:
-                    raise ValueError(
-                        'Blockchain.stream() is for operation level streams. '
-                        'For block level streaming, use '
-                        'Blockchain.stream_from()')
-                events = [ops]
-
-            for event in events:
-                op_type, op = event['op']
-                if not filter_by or op_type in filter_by:
-                    # return unmodified steemd output
-                    if kwargs.get('raw_output'):
-                        yield event
+        filter_by = frozenset(filter_by)
+        if filter_by and filter_by <= virtual_operations:
+            # only virtual ops are wanted; let steemd leave out the rest
+            kwargs['virtual_only'] = True
+        # stream_from()'s sixth argument
+        virtual_only = bool(args[5] if len(args) > 5 else
+                            kwargs.get('virtual_only'))
+        if len(args) < 3:
+            # ops are flattened below; one generator step per block is
+            # cheaper than one per operation
+            kwargs.setdefault('batch_operations', True)
+
+        raw_output = kwargs.get('raw_output')
+        checkpoint = kwargs.pop('checkpoint', None)
+        store = kwargs.pop('checkpoint_store', None)
+        checkpoint_interval = kwargs.pop('checkpoint_interval', 100)
+
+        resume_from = None
+        if checkpoint:
+            if store is None:
+                store = SqliteCheckpointStore()
+            resume_from = store.load(checkpoint)
+            if resume_from and resume_from[2] != virtual_only:
+                # op indexes count other ops; resuming would skip or
+                # replay some of them
+                raise ValueError(
+                    'Checkpoint %r was saved by a stream of %s operations, '
+                    'and can not be resumed with filter %s' % (
+                        checkpoint,
+                        'virtual' if resume_from[2] else 'all',
+                        sorted(filter_by)))
+            if resume_from:
+                if args:
+                    args = (resume_from[0],) + tuple(args[1:])
+                else:
+                    kwargs['start_block'] = resume_from[0]
+
+        # position of the last fully processed operation
+        processed = None
+        unsaved = 0
+        block_num, index = None, -1
+        try:
+            for ops in self.stream_from(*args, **kwargs):
+
+                # deal with different self.stream_from() outputs
+                events = ops
+                if type(ops) == dict:
+                    if 'witness_signature' in ops:
+                        raise ValueError(
+                            'Blockchain.stream() is for operation level '
+                            'streams. For block level streaming, use '
+                            'Blockchain.stream_from()')
+                    events = [ops]
+
+                for event in events:
+                    if event.get('block') == block_num:
+                        index += 1
                     else:
-                        updated_op = op.copy()
-                        updated_op.update({
-                            "_id": self.hash_op(event),
-                            "type": op_type,
-                            "timestamp": parse_time(event.get("timestamp")),
-                            "block_num": event.get("block"),
-                            "trx_id": event.get("trx_id"),
-                        })
-                        yield updated_op
+                        block_num, index = event.get('block'), 0
+                    if resume_from and (block_num, index) <= \
+                            resume_from[:2]:
+                        continue
+
+                    # filter on the raw op name before doing any work
+                    op_type = event['op'][0]
+                    if not filter_by or op_type in filter_by:
+                        # return unmodified steemd output
+                        if raw_output:
+                            yield event
+                        else:
+                            updated_op = event['op'][1].copy()
+                            updated_op.update({
+                                "_id": self.op_id(event),
+                                "type": op_type,
+                                "timestamp": parse_time(
+                                    event.get("timestamp")),
+                                "block_num": event.get("block"),
+                                "trx_id": event.get("trx_id"),
+                            })
+                            yield updated_op
+
+                    if checkpoint:
+                        processed = (block_num, index, virtual_only)
+                        unsaved += 1
+                        if unsaved >= checkpoint_interval:
+                            store.save(checkpoint, processed)
+                            unsaved = 0
+        finally:
+            if checkpoint and unsaved:
+                store.save(checkpoint, processed)
 
     def history(self,
                 filter_by=list(),
@@ -285,6 +640,64 @@ class Blockchain(object):
             raw_output=raw_output,
             **kwargs)
 
+    def history_parallel(self,
+                         filter_by=list(),
+                         start_block=1,
+                         end_block=None,
+                         raw_output=False,
+                         shard_size=10000,
+                         processes=None,
+                         ordered=True):
+        """ Yield historic operations like ``Blockchain.history()``, but
+        fetch and parse them in a pool of worker processes.
+
+        ``[start_block, end_block]`` is split into shards of ``shard_size``
+        blocks, and every worker replays whole shards with a ``Steemd``
+        instance of its own, connected to the same nodes as this one (or
+        with its own mapping of the same ``source`` archive).
+        Only about two shards per process are buffered at a time.
+
+        Args:
+            filter_by (str, list): List of operations to filter for
+            start_block (int): Block to start with. Defaults to block 1.
+            end_block (int): Last block to replay. Defaults to the current
+                block.
+            raw_output (bool): (Defaults to False). If True, return ops in a
+                unmodified steemd structure.
+            shard_size (int): Number of blocks per shard.
+            processes (int): Number of worker processes. Defaults to the
+                number of CPUs.
+            ordered (bool): (Defaults to True). If False, yield whole shards
+                as soon as they are done, in any order.
+
+        .. code-block:: python
+
+           b = Blockchain()
+           for op in b.history_parallel(['vote'], 1, 10000000,
+                                        ordered=False):
+               process(op)
+        """
+        if isinstance(filter_by, str):
+            filter_by = [filter_by]
+        if end_block is None:
+            end_block = self.get_current_block_num()
+
+        source = self.source or list(self.steem.nodes)
+        mode = 'head' if self.mode == 'head_block_number' else 'irreversible'
+        tasks = ((source, mode, self.id_scheme,
+                  (x, min(x + shard_size, end_block + 1)),
+                  filter_by, raw_output)
+                 for x in range(start_block, end_block + 1, shard_size))
+
+        processes = processes or multiprocessing.cpu_count()
+        imap = imap_ordered if ordered else imap_unordered
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=processes) as executor:
+            for ops in imap(_replay_shard, tasks, window=2 * processes,
+                            executor=executor):
+                for op in ops:
+                    yield op
+
     def ops(self, *args, **kwargs):
         raise DeprecationWarning('Blockchain.ops() is deprecated. Please use '
                                  + 'Blockchain.stream_from() instead.')
@@ -300,6 +713,23 @@ class Blockchain(object):
         data = json.dumps(event, sort_keys=True)
         return hashlib.sha1(compat_bytes(data, 'utf-8')).hexdigest()
 
+    @staticmethod
+    def position_id(event, account=None):
+        """ Identify a raw operation by its position in the blockchain.
+
+        The id is built from the ``block``, ``trx_in_block``, ``op_in_trx``
+        and ``virtual_op`` fields and the operation name, ie.
+        ``'20000000/3/0/0/vote'``, and is an order of magnitude cheaper to
+        compute than ``hash_op()``. Pass ``account`` to tell apart copies
+        of an operation in the histories of several accounts.
+        """
+        op_id = '%s/%s/%s/%s/%s' % (
+            event.get('block'), event.get('trx_in_block'),
+            event.get('op_in_trx'), event.get('virtual_op'), event['op'][0])
+        if account:
+            op_id = '%s/%s' % (account, op_id)
+        return op_id
+
     def get_all_usernames(self, *args, **kwargs):
         """ Fetch the full list of STEEM usernames. """
         _ = args, kwargs
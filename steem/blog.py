@@ -16,6 +16,8 @@ class Blog:
             comments_only (bool): (Default False). Toggle between posts
                 and comments.
             steemd_instance (Steemd): Steemd instance overload
+            history_store (AccountHistoryStore): Read the account history
+                from this local store. See ``steem.history_store``.
 
         Returns:
             Generator with Post objects in reverse chronological order.
@@ -43,10 +45,12 @@ class Blog:
     def __init__(self,
                  account_name,
                  comments_only=False,
-                 steemd_instance=None):
+                 steemd_instance=None,
+                 history_store=None):
         self.steem = steemd_instance or shared_steemd_instance()
         self.comments_only = comments_only
-        self.account = Account(account_name)
+        self.account = Account(account_name, steemd_instance=self.steem,
+                               history_store=history_store)
         self.history = self.account.history_reverse(filter_by='comment')
         self.seen_items = set()
 
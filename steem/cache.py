@@ -0,0 +1,85 @@
+import threading
+import time
+
+
+class TTLCache(object):
+    """ A thread-safe cache of results which may be up to ``ttl`` seconds
+    old, ie. chain state like the dynamic global properties or the price
+    feed.
+
+    ``Steemd`` keeps one as ``Steemd.cache`` for the methods called with
+    ``cached=True``. Entries of ``block_keys``, which change with every
+    block, are also dropped by ``new_block()``; ``Steemd`` calls it
+    whenever it sees a newer head block. Other entries, ie. the price
+    feed, only expire after ``ttl``.
+
+    Concurrent misses of the same key are not coalesced; each of them
+    fetches, and the last result is kept.
+
+    Args:
+        ttl (float): Maximum age of returned entries, in seconds. 0
+            disables caching.
+        block_keys (list): Keys invalidated by ``new_block()``.
+
+    .. code-block:: python
+
+       from steem.steemd import Steemd
+
+       s = Steemd(cache_ttl=10)
+       props = s.get_dynamic_global_properties(cached=True)
+       print(s.cache.hits, s.cache.misses)
+
+    """
+
+    def __init__(self, ttl=3, block_keys=()):
+        self.ttl = ttl
+        self.block_keys = frozenset(block_keys)
+        self.lock = threading.Lock()
+        #: ``{key: (time stored, value)}``
+        self.entries = {}
+        #: newest block number passed to ``new_block()``
+        self.block_num = 0
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key):
+        """ Return ``(True, value)`` if the entry of ``key`` is recent
+        enough, otherwise ``(False, None)``. Counts a hit or a miss. """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.time() - entry[0] < self.ttl:
+                self.hits += 1
+                return True, entry[1]
+            self.misses += 1
+            return False, None
+
+    def get(self, key, fetch):
+        """ Return the entry of ``key`` if it is recent enough, otherwise
+        call ``fetch()`` and store its result. """
+        hit, value = self.lookup(key)
+        if not hit:
+            value = fetch()
+            self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.time(), value)
+
+    def invalidate(self, *keys):
+        """ Drop the entries of ``keys``, or all entries. """
+        with self.lock:
+            if not keys:
+                self.entries.clear()
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def new_block(self, block_num):
+        """ Invalidation hook for new blocks: drops the entries of
+        ``block_keys`` if ``block_num`` is newer than any block seen
+        before. """
+        with self.lock:
+            if block_num > self.block_num:
+                self.block_num = block_num
+                for key in self.block_keys:
+                    self.entries.pop(key, None)
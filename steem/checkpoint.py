@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import threading
+
+from steembase.storage import DataDir
+
+
+class CheckpointStore(object):
+    """ Remembers how far a named stream got.
+
+    A position is a ``(block_num, index, virtual_only)`` tuple, where
+    ``index`` is the position of an operation within the ops of its block
+    as returned by ``get_ops_in_block(block_num, virtual_only)``, or ``-1``
+    for "nothing of this block yet". The index is only meaningful for the
+    same ``virtual_only``.
+    """
+
+    def load(self, name):
+        """ Return the saved position of stream ``name``, or ``None``. """
+        raise NotImplementedError
+
+    def save(self, name, position):
+        """ Persist ``position`` as the last processed position of stream
+        ``name``. """
+        raise NotImplementedError
+
+    def delete(self, name):
+        """ Forget stream ``name``. """
+        raise NotImplementedError
+
+
+class MemoryCheckpointStore(CheckpointStore):
+    """ Keeps checkpoints in memory; mostly useful for tests. """
+
+    def __init__(self):
+        self.positions = {}
+
+    def load(self, name):
+        return self.positions.get(name)
+
+    def save(self, name, position):
+        self.positions[name] = tuple(position)
+
+    def delete(self, name):
+        self.positions.pop(name, None)
+
+
+class SqliteCheckpointStore(CheckpointStore):
+    """ Keeps checkpoints in a SQLite database.
+
+    Args:
+        path (str): Database file. Defaults to ``checkpoints.sqlite`` in
+            the steem data directory.
+
+    """
+    __tablename__ = 'checkpoints'
+
+    def __init__(self, path=None):
+        if path is None:
+            DataDir().mkdir_p()
+            path = os.path.join(DataDir.data_dir, 'checkpoints.sqlite')
+        self.path = path
+        self.lock = threading.Lock()
+        # generators may be resumed from other threads
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS %s ('
+            'name TEXT PRIMARY KEY, block_num INTEGER, op_index INTEGER, '
+            'virtual_only INTEGER)'
+            % self.__tablename__)
+        self.connection.commit()
+
+    def load(self, name):
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT block_num, op_index, virtual_only FROM %s '
+                'WHERE name=?' % self.__tablename__, (name,)).fetchone()
+        if not row:
+            return None
+        return row[0], row[1], bool(row[2])
+
+    def save(self, name, position):
+        block_num, index, virtual_only = position
+        with self.lock:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO %s '
+                '(name, block_num, op_index, virtual_only) '
+                'VALUES (?, ?, ?, ?)' % self.__tablename__,
+                (name, block_num, index, int(virtual_only)))
+            self.connection.commit()
+
+    def delete(self, name):
+        with self.lock:
+            self.connection.execute(
+                'DELETE FROM %s WHERE name=?' % self.__tablename__, (name,))
+            self.connection.commit()
+
+    def close(self):
+        self.connection.close()
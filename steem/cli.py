@@ -11,6 +11,7 @@ import sys
 from prettytable import PrettyTable
 from steembase.storage import configStorage
 from steembase.account import PrivateKey
+from steembase.exceptions import AccountDoesNotExistsException
 
 from .account import Account
 from .amount import Amount
@@ -1009,8 +1010,11 @@ def legacyentry():
 
     elif args.command == "balance":
         if args.account and isinstance(args.account, list):
+            accounts = Account.load_many(args.account)
             for account in args.account:
-                a = Account(account)
+                a = accounts.get(account)
+                if a is None:
+                    raise AccountDoesNotExistsException(account)
 
                 print("\n%s" % a.name)
                 t = PrettyTable(["Account", "STEEM", "SBD", "VESTS"])
@@ -11,6 +11,9 @@ class Converter(object):
         :param Steemd steemd_instance: Steemd() instance to
         use when accessing a RPC
 
+        Chain state is read through the ``Steemd`` cache, so conversions
+        may use properties and prices up to ``cache_ttl`` seconds old.
+
     """
 
     def __init__(self, steemd_instance=None):
@@ -22,14 +25,14 @@ class Converter(object):
         """ Obtain the sbd price as derived from the median over all
             witness feeds. Return value will be SBD
         """
-        return (Amount(self.steemd.get_feed_history()['current_median_history']
-                       ['base']).amount / Amount(self.steemd.get_feed_history(
-        )['current_median_history']['quote']).amount)
+        median = self.steemd.get_feed_history(
+            cached=True)['current_median_history']
+        return Amount(median['base']).amount / Amount(median['quote']).amount
 
     def steem_per_mvests(self):
         """ Obtain STEEM/MVESTS ratio
         """
-        info = self.steemd.get_dynamic_global_properties()
+        info = self.steemd.get_dynamic_global_properties(cached=True)
         return (Amount(info["total_vesting_fund_steem"]).amount /
                 (Amount(info["total_vesting_shares"]).amount / 1e6))
 
@@ -58,7 +61,7 @@ class Converter(object):
         vesting_shares = int(self.sp_to_vests(sp) * 1e6)
 
         # get props
-        props = self.steemd.get_dynamic_global_properties()
+        props = self.steemd.get_dynamic_global_properties(cached=True)
 
         # determine voting power used
         used_power = int((voting_power * vote_pct) / 10000);
@@ -93,7 +96,7 @@ class Converter(object):
         """
         steem_payout = self.sbd_to_steem(sbd_payout)
 
-        reward_fund = self.steemd.get_reward_fund()
+        reward_fund = self.steemd.get_reward_fund(cached=True)
         reward_balance = Amount(reward_fund['reward_balance']).amount
         recent_claims = int(reward_fund['recent_claims'])
 
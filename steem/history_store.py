@@ -0,0 +1,119 @@
+import os
+import sqlite3
+import threading
+
+from steembase.json_codec import get_codec
+from steembase.storage import DataDir
+
+from .utils import chunkify
+
+
+class AccountHistoryStore(object):
+    """ Keeps account histories in a SQLite database, so that only new
+    items have to be fetched from steemd.
+
+    Items are stored as returned by ``get_account_history``, keyed by
+    ``(account, index)``. Pass the store to ``Account`` to have
+    ``Account.history()``, ``history_reverse()`` and everything built on
+    them (ie. ``curation_stats()`` and ``Blog``) read from it.
+
+    Args:
+        path (str): Database file. Defaults to ``account_history.sqlite`` in
+            the steem data directory.
+        json_codec (str, JsonCodec): JSON codec of the stored items.
+
+    .. code-block:: python
+
+       from steem.account import Account
+       from steem.history_store import AccountHistoryStore
+
+       store = AccountHistoryStore()
+       account = Account('steemit', history_store=store)
+       votes = list(account.history(filter_by='vote'))  # syncs first
+
+    """
+    __tablename__ = 'account_history'
+
+    def __init__(self, path=None, json_codec=None):
+        if path is None:
+            DataDir().mkdir_p()
+            path = os.path.join(DataDir.data_dir, 'account_history.sqlite')
+        self.path = path
+        self.codec = get_codec(json_codec)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS %s ('
+            'account TEXT, idx INTEGER, op_type TEXT, item BLOB, '
+            'PRIMARY KEY (account, idx))' % self.__tablename__)
+        self.connection.commit()
+
+    def last_index(self, account):
+        """ Highest index stored for ``account``, or ``None``. """
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT MAX(idx) FROM %s WHERE account=?'
+                % self.__tablename__, (account,)).fetchone()
+        return row[0]
+
+    def add(self, account, items):
+        """ Store ``(index, event)`` items of ``account``, in a single
+        transaction. Items which are stored already are skipped. """
+        rows = [(account, index, event['op'][0], self.codec.dumps(event))
+                for index, event in items]
+        with self.lock:
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO %s (account, idx, op_type, item) '
+                'VALUES (?, ?, ?, ?)' % self.__tablename__, rows)
+            self.connection.commit()
+
+    def items(self, account, start=0, filter_by=None, reverse=False,
+              page_size=1000):
+        """ Yield stored ``[index, event]`` items of ``account``, starting
+        at index ``start``, optionally only of the ``filter_by`` operation
+        types. Rows are read ``page_size`` at a time. """
+        query = 'SELECT idx, item FROM %s WHERE account=? AND idx>=?' \
+            % self.__tablename__
+        args = [account, start]
+        if filter_by is not None:
+            if isinstance(filter_by, str):
+                filter_by = [filter_by]
+            query += ' AND op_type IN (%s)' % ','.join('?' * len(filter_by))
+            args.extend(filter_by)
+        query += ' AND idx%s? ORDER BY idx%s LIMIT %d' % (
+            ('<', ' DESC', page_size) if reverse else ('>', '', page_size))
+
+        last = float('inf') if reverse else -1
+        while True:
+            with self.lock:
+                rows = self.connection.execute(
+                    query, args + [last]).fetchall()
+            for index, item in rows:
+                yield [index, self.codec.loads(bytes(item))]
+            if len(rows) < page_size:
+                return
+            last = rows[-1][0]
+
+    def sync(self, account, batch_size=1000, max_workers=None):
+        """ Fetch and store the items of ``account`` (an ``Account``)
+        which are newer than the stored ones. Returns their number. """
+        last_index = self.last_index(account.name)
+        start = 0 if last_index is None else last_index + 1
+        count = 0
+        items = account.fetch_history(start=start, batch_size=batch_size,
+                                      max_workers=max_workers)
+        for chunk in chunkify(items, batch_size):
+            self.add(account.name, chunk)
+            count += len(chunk)
+        return count
+
+    def delete(self, account):
+        """ Forget the history of ``account``. """
+        with self.lock:
+            self.connection.execute(
+                'DELETE FROM %s WHERE account=?' % self.__tablename__,
+                (account,))
+            self.connection.commit()
+
+    def close(self):
+        self.connection.close()
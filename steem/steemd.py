@@ -1,17 +1,23 @@
 # coding=utf-8
 import logging
+import time
 
 from funcy.seqs import first
+from toolz import dissoc
 from steembase.chains import known_chains
-from steembase.http_client import HttpClient
+from steembase.exceptions import RPCError, RPCErrorRecoverable
+from steembase.http_client import HttpClient, imap_ordered
+from steembase.operationids import operation_filter
 from steembase.storage import configStorage
 from steembase.transactions import SignedTransaction
 from steembase.types import PointInTime
 
-from .block import Block
+from .block import Block, attach_virtual_ops
+from .block_archive import BlockArchive, virtual_ops
+from .cache import TTLCache
 from .blockchain import Blockchain
 from .post import Post
-from .utils import resolve_identifier
+from .utils import chunkify, resolve_identifier
 from .utils import compat_compose_dictionary
 from .instance import get_config_node_list
 
@@ -27,6 +33,23 @@ class Steemd(HttpClient):
             nodes (list): A list of Steem HTTP RPC nodes to connect to. If
             not provided, official Steemit nodes will be used.
 
+            retry_policy (RetryPolicy): How failed requests are retried.
+            See ``steembase.retry.RetryPolicy``.
+
+            rate_limit (float): Maximum requests per second to each node.
+
+            max_in_flight (int): Maximum concurrent requests to each node.
+
+            block_archive (str, BlockArchive): Directory of a local archive
+            of irreversible blocks. Blocks and their operations are read
+            from it if available, and saved to it once fetched. See
+            ``steem.block_archive.BlockArchive``.
+
+            cache_ttl (float): How old results of methods called with
+            ``cached=True`` may be, in seconds. See ``steem.cache.TTLCache``.
+
+            Other keyword arguments are passed to ``HttpClient``.
+
         Returns:
 
             Steemd class instance. It can be used to execute commands
@@ -54,8 +77,47 @@ class Steemd(HttpClient):
         if not nodes:
             nodes = get_config_node_list() or ['https://api.steemit.com']
 
+        block_archive = kwargs.pop('block_archive', None)
+        cache_ttl = kwargs.pop('cache_ttl', 3)
         super(Steemd, self).__init__(nodes, **kwargs)
 
+        if block_archive is not None and \
+                not isinstance(block_archive, BlockArchive):
+            block_archive = BlockArchive(block_archive)
+        self.block_archive = block_archive
+        #: newest last irreversible block seen
+        self.irreversible_block = 0
+        self._irreversible_checked = 0
+        #: whether the last filtered account history request was
+        #: filtered by the node
+        self.history_filter = None
+        #: recent chain state; see ``cached`` arguments
+        self.cache = TTLCache(
+            cache_ttl, block_keys=[('get_dynamic_global_properties',)])
+
+    def _observe_result(self, name, result, url):
+        super(Steemd, self)._observe_result(name, result, url)
+        if name == 'get_dynamic_global_properties' and result:
+            self.irreversible_block = max(
+                self.irreversible_block,
+                result.get('last_irreversible_block_num') or 0)
+            self.cache.new_block(result.get('head_block_number') or 0)
+            self.cache.put(('get_dynamic_global_properties',), result)
+
+    def _is_irreversible(self, block_num):
+        """ Whether ``block_num`` is known to be irreversible. Asks steemd
+        at most once per block interval. """
+        if block_num > self.irreversible_block and \
+                time.time() - self._irreversible_checked > 3:
+            self._irreversible_checked = time.time()
+            self.get_dynamic_global_properties()
+        return block_num <= self.irreversible_block
+
+    def _archive(self, kind, block_num, data):
+        if self.block_archive is not None and \
+                self._is_irreversible(block_num):
+            self.block_archive.put(kind, block_num, data)
+
     @property
     def chain_params(self):
         """ Identify the connected network. This call returns a
@@ -187,11 +249,146 @@ class Steemd(HttpClient):
             A generator with results.
 
         """
-        results = self.call_multi_with_futures(
-            'get_block', blocks, max_workers=10)
+        results = self.call_batch(
+            [('get_block', [x], {'api': 'database_api'}) for x in blocks])
         return (compat_compose_dictionary(x, block_num=int(x['block_id'][:8], base=16))
                 for x in results if x)
 
+    def _get_blocks_ensured(self, block_nums, attempts=3):
+        """ Fetch ``block_nums`` in batches, re-requesting blocks missing
+        from the results up to ``attempts`` times. """
+        blocks = {}
+        if self.block_archive is not None:
+            for x in block_nums:
+                block = self.block_archive.get('blocks', x)
+                if block:
+                    blocks[x] = compat_compose_dictionary(block, block_num=x)
+        missing = [x for x in block_nums if x not in blocks]
+        for _ in range(attempts):
+            if not missing:
+                break
+            for block in self._get_blocks(missing):
+                blocks[block['block_num']] = block
+                self._archive('blocks', block['block_num'],
+                              dissoc(block, 'block_num'))
+            missing = [x for x in block_nums if x not in blocks]
+        if missing:
+            raise RPCError('Blocks %s are not available' % missing)
+        return [blocks[x] for x in block_nums]
+
+    def _get_blocks_with_virtual_ops(self, block_nums):
+        """ Like ``_get_blocks_ensured()``, with the virtual operations of
+        every block attached (see ``attach_virtual_ops()``). """
+        if self.block_archive is not None:
+            blocks = self._get_blocks_ensured(block_nums)
+            ops = self._get_ops_in_blocks(block_nums, virtual_only=True)
+        else:
+            # blocks and their ops in the same batches; proxies like jussi
+            # reject batches of more than 50 calls, so these are split
+            calls = []
+            for x in block_nums:
+                calls.append(('get_block', [x], {'api': 'database_api'}))
+                calls.append(('get_ops_in_block', [x, True],
+                              {'api': 'database_api'}))
+            results = self.call_batch(calls)
+            blocks, ops = results[::2], results[1::2]
+            missing = [x for x, block in zip(block_nums, blocks)
+                       if not block]
+            retried = dict(zip(missing, self._get_blocks_ensured(missing)))
+            blocks = [retried.get(x) or compat_compose_dictionary(
+                block, block_num=x) for x, block in zip(block_nums, blocks)]
+        return [attach_virtual_ops(block, block_ops)
+                for block, block_ops in zip(blocks, ops)]
+
+    def iter_blocks(self, block_nums, batch_size=50, window=None,
+                    with_virtual_ops=False):
+        """ Stream multiple blocks from steemd, in order.
+
+        Blocks are requested in batches of ``batch_size``, several batches
+        at once, and yielded as soon as all blocks before them arrived.
+        Only ``window`` batches are fetched ahead of the consumer, so
+        memory use does not depend on the number of blocks.
+
+        Args:
+
+            block_nums (iterable): Block numbers to fetch. May be a
+            generator.
+
+            batch_size (int): Blocks per JSON-RPC batch request.
+
+            window (int): Batches in flight. Defaults to
+            ``2 * max_workers``.
+
+            with_virtual_ops (bool): Also fetch the virtual operations of
+            every block, in the same batches, and attach them to the
+            block. See ``steem.block.attach_virtual_ops()``.
+
+        Returns:
+            generator: An ensured and ordered stream of `get_block`
+            results.
+
+        """
+        fetch = self._get_blocks_ensured
+        if with_virtual_ops:
+            fetch = self._get_blocks_with_virtual_ops
+        batches = imap_ordered(fetch,
+                               chunkify(block_nums, batch_size),
+                               max_workers=self.max_workers or 10,
+                               window=window)
+        for batch in batches:
+            for block in batch:
+                yield block
+
+    def iter_blocks_range(self, start, end, **kwargs):
+        """ Stream multiple blocks from steemd, given a range.
+
+        Unlike ``get_blocks_range()``, this works for ranges of any size.
+        See ``iter_blocks()`` for the keyword arguments.
+
+        .. code-block:: python
+
+           for block in steemd.iter_blocks_range(1, 10000000):
+               print(block['block_num'])
+
+        """
+        return self.iter_blocks(range(start, end), **kwargs)
+
+    def _get_ops_in_blocks(self, block_nums, virtual_only=False):
+        results = {}
+        if self.block_archive is not None:
+            for x in block_nums:
+                ops = self.block_archive.get('ops', x)
+                if ops is not None:
+                    results[x] = virtual_ops(ops) if virtual_only \
+                        else ops
+        missing = [x for x in block_nums if x not in results]
+        if missing:
+            fetched = self.call_batch(
+                [('get_ops_in_block', [x, virtual_only],
+                  {'api': 'database_api'}) for x in missing])
+            for x, ops in zip(missing, fetched):
+                results[x] = ops
+                if not virtual_only:
+                    self._archive('ops', x, ops)
+        return [results[x] for x in block_nums]
+
+    def iter_ops_in_blocks(self, block_nums, virtual_only=False,
+                           batch_size=50, window=None):
+        """ Stream the operations of multiple blocks from steemd, in order.
+
+        Works like ``iter_blocks()``, but yields the ``get_ops_in_block``
+        result (a list of operations) of every block.
+
+        """
+        batches = imap_ordered(
+            lambda nums: self._get_ops_in_blocks(nums, virtual_only),
+            chunkify(block_nums, batch_size),
+            max_workers=self.max_workers or 10,
+            window=window)
+        for batch in batches:
+            for ops in batch:
+                yield ops
+
     def get_blocks(self, block_nums):
         """ Fetch multiple blocks from steemd at once, given a range.
 
@@ -205,23 +402,13 @@ class Steemd(HttpClient):
             dict: An ensured and ordered list of all `get_block` results.
 
         """
-        required = set(block_nums)
-        available = set()
-        missing = required - available
-        blocks = {}
-
-        while missing:
-            for block in self._get_blocks(missing):
-                blocks[block['block_num']] = block
-
-            available = set(blocks.keys())
-            missing = required - available
-
-        return [blocks[x] for x in block_nums]
+        return list(self.iter_blocks(block_nums))
 
     def get_blocks_range(self, start, end):
         """ Fetch multiple blocks from steemd at once, given a range.
 
+        Use ``iter_blocks_range()`` for large ranges.
+
         Args:
 
             start (int): The number of the block to start with
@@ -233,12 +420,13 @@ class Steemd(HttpClient):
             dict: An ensured and ordered list of all `get_block` results.
 
         """
-        return self.get_blocks(list(range(start, end)))
+        return list(self.iter_blocks_range(start, end))
 
-    def get_reward_fund(self, fund_name='post'):
+    def get_reward_fund(self, fund_name='post', cached=False):
         """ Get details for a reward fund.
 
-        Right now the only pool available is 'post'.
+        Right now the only pool available is 'post'. With ``cached``, a
+        result up to ``cache_ttl`` seconds old may be returned.
 
         Example:
 
@@ -258,6 +446,9 @@ class Steemd(HttpClient):
                  'reward_balance': '555660.895 STEEM'}
 
         """
+        if cached:
+            return self.cache.get(('get_reward_fund', fund_name),
+                                  lambda: self.get_reward_fund(fund_name))
         return self.call('get_reward_fund', fund_name, api='database_api')
 
     def get_expiring_vesting_delegations(self, account,
@@ -399,23 +590,51 @@ class Steemd(HttpClient):
             dict in a JSON compatible format.
 
         """
-        return self.call('get_block', block_num, api='database_api')
+        if self.block_archive is None:
+            return self.call('get_block', block_num, api='database_api')
+
+        block = self.block_archive.get('blocks', block_num)
+        if block is None:
+            block = self.call('get_block', block_num, api='database_api')
+            if block:
+                self._archive('blocks', block_num, block)
+        return block
 
     def get_ops_in_block(self, block_num, virtual_only):
         """ get_ops_in_block """
-        return self.call(
-            'get_ops_in_block', block_num, virtual_only, api='database_api')
+        if self.block_archive is None:
+            return self.call('get_ops_in_block', block_num, virtual_only,
+                             api='database_api')
+
+        ops = self.block_archive.get('ops', block_num)
+        if ops is None:
+            ops = self.call('get_ops_in_block', block_num, virtual_only,
+                            api='database_api')
+            if not virtual_only:
+                self._archive('ops', block_num, ops)
+            return ops
+        return virtual_ops(ops) if virtual_only else ops
 
     def get_state(self, path):
         """ get_state """
         return self.call('get_state', path, api='database_api')
 
-    def get_config(self):
-        """ Get internal chain configuration. """
+    def get_config(self, cached=False):
+        """ Get internal chain configuration. With ``cached``, a result
+        up to ``cache_ttl`` seconds old may be returned. """
+        if cached:
+            return self.cache.get(('get_config',), self.get_config)
         return self.call('get_config', api='database_api')
 
-    def get_dynamic_global_properties(self):
-        """ get_dynamic_global_properties """
+    def get_dynamic_global_properties(self, cached=False):
+        """ get_dynamic_global_properties
+
+        With ``cached``, a result up to ``cache_ttl`` seconds old may be
+        returned. Every fresh result is cached as well.
+        """
+        if cached:
+            return self.cache.get(('get_dynamic_global_properties',),
+                                  self.get_dynamic_global_properties)
         return self.call('get_dynamic_global_properties', api='database_api')
 
     def get_chain_properties(self):
@@ -430,8 +649,10 @@ class Steemd(HttpClient):
         """
         return self.call('get_chain_properties', api='database_api')
 
-    def get_feed_history(self):
+    def get_feed_history(self, cached=False):
         """ Get the hourly averages of witness reported STEEM/SBD prices.
+        With ``cached``, a result up to ``cache_ttl`` seconds old may be
+        returned.
 
         ::
 
@@ -445,6 +666,9 @@ class Steemd(HttpClient):
               {'base': '0.093 SBD', 'quote': '1.010 STEEM'},
 
         """
+        if cached:
+            return self.cache.get(('get_feed_history',),
+                                  self.get_feed_history)
         return self.call('get_feed_history', api='database_api')
 
     def get_current_median_history_price(self):
@@ -522,7 +746,8 @@ class Steemd(HttpClient):
         return self.call(
             'get_conversion_requests', account, api='database_api')
 
-    def get_account_history(self, account, index_from, limit):
+    def get_account_history(self, account, index_from, limit,
+                            filter_by=None):
         """ History of all operations for a given account.
 
         Args:
@@ -534,6 +759,9 @@ class Steemd(HttpClient):
 
            limit (int): How many items are we interested in.
 
+           filter_by (str, list): Only return these operations. See
+           below.
+
         Returns:
 
            list: List of operations.
@@ -607,14 +835,68 @@ class Steemd(HttpClient):
 
               s.get_account_history('furion', index_from=200, limit=100)
 
+           With ``filter_by``, nodes which support ``operation_filter_low``
+           and ``operation_filter_high`` return up to ``limit`` matching
+           operations at or below ``index_from``, scanning as far back as
+           needed. Other nodes, and filters of operations which are not in
+           ``operationids.filterable_operations``, return the usual range
+           of items, filtered here. Virtual operations are never filtered
+           by the node; ``Account.curation_stats()``, which looks for
+           ``curation_reward``, still pages through the whole history.
+
+           ``history_filter`` tells whether the last filtered request was
+           filtered by the node; it is ``None`` until the first one. Nodes
+           may differ, so a node rejecting filters makes this request, and
+           the following ones, fall back to local filtering.
+
+           .. code-block:: python
+
+              s.get_account_history('furion', index_from=-1, limit=100,
+                                    filter_by=['transfer'])
 
         """
-        return self.call(
-            'get_account_history',
-            account,
-            index_from,
-            limit,
-            api='database_api')
+        if filter_by is None:
+            return self.call(
+                'get_account_history',
+                account,
+                index_from,
+                limit,
+                api='database_api')
+
+        if isinstance(filter_by, str):
+            filter_by = [filter_by]
+        if self.history_filter is not False:
+            try:
+                low, high = operation_filter(filter_by)
+            except KeyError:
+                # virtual operations and renumbered ones are filtered here
+                pass
+            else:
+                try:
+                    history = self.call('get_account_history', account,
+                                        index_from, limit, low, high,
+                                        api='database_api')
+                except RPCErrorRecoverable:
+                    raise
+                except RPCError as e:
+                    # calls may go to another node than the last one
+                    logger.info('Filtering account history locally: %s', e)
+                    self.history_filter = False
+                else:
+                    unexpected = set(x[1]['op'][0] for x in history) - \
+                        set(filter_by)
+                    if not unexpected:
+                        self.history_filter = True
+                        return history
+                    # the node numbers operations differently
+                    logger.warning('Filtering account history locally, '
+                                   'node returned %s', sorted(unexpected))
+                    self.history_filter = False
+
+        if index_from >= 0:
+            limit = min(limit, index_from)
+        history = self.get_account_history(account, index_from, limit)
+        return [x for x in history if x[1]['op'][0] in filter_by]
 
     def get_owner_history(self, account):
         """ get_owner_history """
@@ -0,0 +1,225 @@
+# coding=utf-8
+import inspect
+import logging
+
+from funcy.seqs import first
+from steembase.chains import known_chains
+from steembase.exceptions import RPCError
+from steembase.http_client_async import AsyncHttpClient
+
+from .cache import TTLCache
+from .instance import get_config_node_list
+from .steemd import Steemd
+from .steemd_methods import api_methods
+from .utils import compat_compose_dictionary
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSteemd(AsyncHttpClient):
+    """ Connect to the Steem network using asyncio.
+
+        ``AsyncSteemd`` offers the same RPC methods as ``Steemd``, but every
+        method is a coroutine. Calls share one connection pool, which makes
+        it cheap to keep many of them in flight at once.
+
+        Helpers of ``Steemd`` which return ``Post`` objects or generators
+        (ie. ``get_posts()``, ``stream_comments()``) are not available.
+        ``get_account_history(filter_by=...)`` always filters locally.
+
+        Args:
+
+            nodes (list): A list of Steem HTTP RPC nodes to connect to. If
+            not provided, official Steemit nodes will be used.
+
+            cache_ttl (float): How old results of methods called with
+            ``cached=True`` may be, in seconds. See ``steem.cache.TTLCache``.
+
+        Example:
+
+           .. code-block:: python
+
+               import asyncio
+
+               async def main():
+                   async with AsyncSteemd() as s:
+                       blocks = await s.get_blocks(range(1, 1001))
+                       props = await s.get_dynamic_global_properties()
+
+               asyncio.get_event_loop().run_until_complete(main())
+
+       """
+
+    def __init__(self, nodes=None, **kwargs):
+        if not nodes:
+            nodes = get_config_node_list() or ['https://api.steemit.com']
+
+        cache_ttl = kwargs.pop('cache_ttl', 3)
+        super(AsyncSteemd, self).__init__(nodes, **kwargs)
+
+        #: recent chain state; see ``cached`` arguments
+        self.cache = TTLCache(
+            cache_ttl, block_keys=[('get_dynamic_global_properties',)])
+
+    def _observe_result(self, name, result, url):
+        super(AsyncSteemd, self)._observe_result(name, result, url)
+        if name == 'get_dynamic_global_properties' and result:
+            self.cache.new_block(result.get('head_block_number') or 0)
+            self.cache.put(('get_dynamic_global_properties',), result)
+
+    async def _cached(self, key, fetch):
+        hit, value = self.cache.lookup(key)
+        if not hit:
+            value = await fetch()
+            self.cache.put(key, value)
+        return value
+
+    @property
+    async def chain_params(self):
+        """ Identify the connected network. """
+        props = await self.get_dynamic_global_properties()
+        chain = props["current_supply"].split(" ")[1]
+
+        assert chain in known_chains, "The chain you are connecting " + \
+                                      "to is not supported"
+        return known_chains.get(chain)
+
+    @property
+    async def last_irreversible_block_num(self):
+        """ Newest irreversible block number. """
+        props = await self.get_dynamic_global_properties()
+        return props['last_irreversible_block_num']
+
+    @property
+    async def head_block_number(self):
+        """ Newest block number. """
+        props = await self.get_dynamic_global_properties()
+        return props['head_block_number']
+
+    async def get_dynamic_global_properties(self, cached=False):
+        """ get_dynamic_global_properties """
+        if cached:
+            return await self._cached(('get_dynamic_global_properties',),
+                                      self.get_dynamic_global_properties)
+        return await self.call('get_dynamic_global_properties',
+                               api='database_api')
+
+    async def get_feed_history(self, cached=False):
+        """ Get the hourly averages of witness reported STEEM/SBD prices.
+        """
+        if cached:
+            return await self._cached(('get_feed_history',),
+                                      self.get_feed_history)
+        return await self.call('get_feed_history', api='database_api')
+
+    async def get_reward_fund(self, fund_name='post', cached=False):
+        """ Get details for a reward fund. """
+        if cached:
+            return await self._cached(
+                ('get_reward_fund', fund_name),
+                lambda: self.get_reward_fund(fund_name))
+        return await self.call('get_reward_fund', fund_name,
+                               api='database_api')
+
+    async def get_config(self, cached=False):
+        """ Get internal chain configuration. """
+        if cached:
+            return await self._cached(('get_config',), self.get_config)
+        return await self.call('get_config', api='database_api')
+
+    async def get_account_history(self, account, index_from, limit,
+                                  filter_by=None):
+        """ History of all operations for a given account. Items which
+        are not ``filter_by`` operations are dropped locally. """
+        history = await self.call('get_account_history', account,
+                                  index_from, limit, api='database_api')
+        if filter_by is None:
+            return history
+        if isinstance(filter_by, str):
+            filter_by = [filter_by]
+        return [x for x in history if x[1]['op'][0] in filter_by]
+
+    async def get_account(self, account):
+        """ Lookup account information such as user profile, public keys,
+        balances, etc. """
+        return first(await self.call('get_accounts', [account]))
+
+    async def get_all_usernames(self, last_user=''):
+        """ Fetch the full list of STEEM usernames. """
+        usernames = await self.lookup_accounts(last_user, 1000)
+        batch = []
+        while len(batch) != 1:
+            batch = await self.lookup_accounts(usernames[-1], 1000)
+            usernames += batch[1:]
+
+        return usernames
+
+    async def _get_blocks(self, blocks):
+        results = await self.call_batch(
+            [('get_block', [x], {'api': 'database_api'}) for x in blocks])
+        return [compat_compose_dictionary(
+            x, block_num=int(x['block_id'][:8], base=16))
+            for x in results if x]
+
+    async def _get_blocks_ensured(self, block_nums, attempts=3):
+        """ Fetch ``block_nums``, re-requesting blocks missing from the
+        results up to ``attempts`` times, like
+        ``Steemd._get_blocks_ensured()``. """
+        blocks = {}
+        missing = block_nums
+        for _ in range(attempts):
+            if not missing:
+                break
+            for block in await self._get_blocks(missing):
+                blocks[block['block_num']] = block
+            missing = [x for x in block_nums if x not in blocks]
+        if missing:
+            raise RPCError('Blocks %s are not available' % missing)
+        return [blocks[x] for x in block_nums]
+
+    async def get_blocks(self, block_nums):
+        """ Fetch multiple blocks from steemd at once.
+
+        Returns:
+
+            list: An ensured and ordered list of all `get_block` results.
+
+        """
+        return await self._get_blocks_ensured(list(block_nums))
+
+    async def get_blocks_range(self, start, end):
+        """ Fetch multiple blocks from steemd at once, given a range. """
+        return await self.get_blocks(range(start, end))
+
+    async def get_key_references(self, public_keys):
+        """ get_key_references """
+        if isinstance(public_keys, str):
+            public_keys = [public_keys]
+        return await self.call(
+            'get_key_references', public_keys, api='account_by_key_api')
+
+
+def _rpc_method(method_name, api):
+    """ Build a coroutine which takes the arguments of the ``Steemd``
+    method, defaults included, and sends them as RPC params. """
+    signature = inspect.signature(getattr(Steemd, method_name))
+
+    async def rpc_method(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        params = list(bound.arguments.values())[1:]
+        return await self.call(method_name, *params, api=api)
+
+    rpc_method.__name__ = method_name
+    rpc_method.__doc__ = getattr(Steemd, method_name).__doc__
+    rpc_method.__signature__ = signature
+    return rpc_method
+
+
+# generate plain RPC wrappers for every method Steemd offers
+for _endpoint in api_methods:
+    _method_name = _endpoint['method']
+    if hasattr(Steemd, _method_name) and \
+            _method_name not in AsyncSteemd.__dict__:
+        setattr(AsyncSteemd, _method_name,
+                _rpc_method(_method_name, _endpoint['api']))
@@ -63,10 +63,12 @@ class TransactionBuilder(dict):
 
             if sum([x[1] for x in r]) < required_treshold:
                 # go one level deeper
+                auth_accounts = Account.load_many(
+                    [x[0] for x in account[permission]["account_auths"]],
+                    steemd_instance=self.steemd)
                 for authority in account[permission]["account_auths"]:
-                    auth_account = Account(
-                        authority[0], steemd_instance=self.steemd)
-                    r.extend(fetchkeys(auth_account, level + 1))
+                    r.extend(fetchkeys(auth_accounts[authority[0]],
+                                       level + 1))
 
             return r
 
@@ -162,9 +164,11 @@ class TransactionBuilder(dict):
         # how to sign later. This is an array, because we
         # may later want to allow multiple operations per tx
         self.update({"required_authorities": {account: authority}})
+        account_auth_accounts = Account.load_many(
+            [x[0] for x in authority["account_auths"]],
+            steemd_instance=self.steemd)
         for account_auth in authority["account_auths"]:
-            account_auth_account = Account(
-                account_auth[0], steemd_instance=self.steemd)
+            account_auth_account = account_auth_accounts[account_auth[0]]
             self["required_authorities"].update({
                 account_auth[0]:
                     account_auth_account.get(permission)
@@ -174,8 +178,7 @@ class TransactionBuilder(dict):
         self["missing_signatures"] = [x[0] for x in authority["key_auths"]]
         # Add one recursion of keys from account_auths:
         for account_auth in authority["account_auths"]:
-            account_auth_account = Account(
-                account_auth[0], steemd_instance=self.steemd)
+            account_auth_account = account_auth_accounts[account_auth[0]]
             self["missing_signatures"].extend(
                 [x[0] for x in account_auth_account[permission]["key_auths"]])
         self["blockchain"] = self.steemd.chain_params
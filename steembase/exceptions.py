@@ -119,3 +119,7 @@ class PostDoesNotExist(Exception):
 
 class VotingInvalidOnArchivedPost(Exception):
     pass
+
+
+class ForkTooDeepException(Exception):
+    pass
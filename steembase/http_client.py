@@ -4,14 +4,22 @@ import logging
 import socket
 import time
 import sys
+import threading
+from collections import deque
 from functools import partial
-from itertools import cycle
+from itertools import islice
 import concurrent.futures
 import certifi
 import urllib3
 from steembase.exceptions import RPCError, RPCErrorRecoverable
+from steembase.json_codec import DECODE_ERRORS, default_codec, get_codec
+from steembase.json_stream import ResultStreamParser
+from steembase.node_scheduler import NodeScheduler
+from steembase.rate_limit import NodeLimiter
+from steembase.retry import RetryPolicy, FAILOVER
 from urllib3.connection import HTTPConnection
 from urllib3.exceptions import MaxRetryError, ReadTimeoutError, ProtocolError
+from urllib3.util.retry import Retry
 
 if sys.version >= '3.5':
     from http.client import RemoteDisconnected
@@ -24,34 +32,121 @@ else:
 
 logger = logging.getLogger(__name__)
 
+# tuple of Exceptions which are eligible for retry
+RETRY_EXCEPTIONS = (MaxRetryError, ReadTimeoutError, ProtocolError,
+                    RPCErrorRecoverable,)
 
-class HttpClient(object):
-    """ Simple Steem JSON-HTTP-RPC API
-
-    This class serves as an abstraction layer for easy use of the Steem API.
-
-    Args:
-      nodes (list): A list of Steem HTTP RPC nodes to connect to.
+if sys.version > '3.5':
+    RETRY_EXCEPTIONS += (json.decoder.JSONDecodeError, RemoteDisconnected,)
+else:
+    RETRY_EXCEPTIONS += (ValueError,)
 
-    .. code-block:: python
+RETRY_EXCEPTIONS += DECODE_ERRORS
 
-       from steem.http_client import HttpClient
+if sys.version > '3.0':
+    RETRY_EXCEPTIONS += (ConnectionResetError,)
+else:
+    RETRY_EXCEPTIONS += (HTTPException,)
+
+# HTTP statuses of overloaded or throttling nodes
+THROTTLE_STATUSES = (429, 503)
+
+# read-only calls which are safe to send to two nodes at once
+HEDGE_METHODS = (
+    'get_block',
+    'get_block_header',
+    'get_ops_in_block',
+    'get_dynamic_global_properties',
+    'get_content',
+    'get_content_replies',
+    'get_accounts',
+    'get_account_history',
+    'get_active_votes',
+)
+
+
+def imap_ordered(fn, iterable, max_workers=10, window=None, executor=None):
+    """ Apply ``fn`` to every item of ``iterable`` in a thread pool, and
+    yield the results in input order.
+
+    At most ``window`` items are in flight at any time, and results are
+    yielded as soon as every result before them is done, so memory use
+    stays constant no matter how long ``iterable`` is. Items whose call
+    raised are re-tried once, inline, before the error is given up on.
 
-       rpc = HttpClient(['https://steemd-node1.com',
-       'https://steemd-node2.com'])
+    Args:
+        fn (callable): Function called with a single item.
+        iterable: Items to process. May be a (lazy) generator.
+        max_workers (int): Size of the thread pool.
+        window (int): Maximum items in flight. Defaults to
+            ``2 * max_workers``.
+        executor (concurrent.futures.Executor): Run ``fn`` in this executor
+            (ie. a process pool) instead of a new thread pool.
 
-    any call available to that port can be issued using the instance
-    via the syntax ``rpc.call('command', *parameters)``.
+    """
+    window = window or 2 * max_workers
+    if executor is None:
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers) as executor:
+            for result in imap_ordered(fn, iterable, window=window,
+                                       executor=executor):
+                yield result
+        return
+
+    items = iter(iterable)
+    pending = deque((item, executor.submit(fn, item))
+                    for item in islice(items, window))
+    while pending:
+        item, future = pending.popleft()
+        for next_item in islice(items, 1):
+            pending.append((next_item, executor.submit(fn, next_item)))
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.warning('Re-fetching %s inline -- %s: %s', item,
+                           e.__class__.__name__, e)
+            result = fn(item)
+        yield result
+
+
+def imap_unordered(fn, iterable, max_workers=10, window=None, executor=None):
+    """ Like ``imap_ordered()``, but yields results as soon as they are
+    done, regardless of input order. """
+    window = window or 2 * max_workers
+    if executor is None:
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers) as executor:
+            for result in imap_unordered(fn, iterable, window=window,
+                                         executor=executor):
+                yield result
+        return
+
+    items = iter(iterable)
+    pending = dict((executor.submit(fn, item), item)
+                   for item in islice(items, window))
+    while pending:
+        done, _ = concurrent.futures.wait(
+            pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            item = pending.pop(future)
+            for next_item in islice(items, 1):
+                pending[executor.submit(fn, next_item)] = next_item
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.warning('Re-fetching %s inline -- %s: %s', item,
+                               e.__class__.__name__, e)
+                result = fn(item)
+            yield result
 
-    Example:
 
-    .. code-block:: python
+class BaseHttpClient(object):
+    """ Transport independent parts of ``HttpClient`` and
+    ``AsyncHttpClient``: node selection and health, request bodies, and
+    the handling of JSON-RPC errors and batch replies.
 
-       rpc.call(
-           'get_followers',
-           'furion', 'abit', 'blog', 10,
-           api='follow_api'
-       )
+    Subclasses send requests with ``_post()`` and start half-open probes
+    with ``_start_probe()``. See ``HttpClient`` for the keyword arguments.
 
     """
 
@@ -62,49 +157,47 @@ class HttpClient(object):
         self.re_raise = kwargs.get('re_raise', True)
         self.max_workers = kwargs.get('max_workers', None)
 
-        num_pools = kwargs.get('num_pools', 10)
-        maxsize = kwargs.get('maxsize', 10)
-        timeout = kwargs.get('timeout', 60)
-        retries = kwargs.get('retries', 20)
-        pool_block = kwargs.get('pool_block', False)
-        tcp_keepalive = kwargs.get('tcp_keepalive', True)
+        self.retry_policy = kwargs.get('retry_policy') or RetryPolicy(
+            max_retries=kwargs.get('max_retries', 10))
 
-        if tcp_keepalive:
-            socket_options = HTTPConnection.default_socket_options + \
-                             [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1), ]
-        else:
-            socket_options = HTTPConnection.default_socket_options
+        self.codec = get_codec(kwargs.get('json_codec'))
 
-        self.http = urllib3.poolmanager.PoolManager(
-            num_pools=num_pools,
-            maxsize=maxsize,
-            block=pool_block,
-            timeout=timeout,
-            retries=retries,
-            socket_options=socket_options,
-            headers={'Content-Type': 'application/json'},
-            cert_reqs='CERT_REQUIRED',
-            ca_certs=certifi.where())
-        '''
-            urlopen(method, url, body=None, headers=None, retries=None,
-            redirect=True, assert_same_host=True, timeout=<object object>,
-            pool_timeout=None, release_conn=None, chunked=False, body_pos=None,
-            **response_kw)
-        '''
-
-        self.nodes = cycle(self.sanitize_nodes(nodes))
         self.url = ''
-        self.request = None
-        self.next_node()
+        self._init_nodes(nodes, **kwargs)
 
         log_level = kwargs.get('log_level', logging.INFO)
         logger.setLevel(log_level)
 
-    def _curr_node_downgraded(self):
-        return self.url in HttpClient.non_appbase_nodes
+    def _init_nodes(self, nodes, **kwargs):
+        self.nodes = self.sanitize_nodes(nodes)
+        self.scheduler = NodeScheduler(
+            self.nodes,
+            quarantine=kwargs.get('node_quarantine', 1),
+            quarantine_max=kwargs.get('node_quarantine_max', 60),
+            failure_threshold=kwargs.get('node_failure_threshold', 1))
+        self.set_node(self.scheduler.best())
+
+        self.limiter_options = dict(
+            rate=kwargs.get('rate_limit'),
+            burst=kwargs.get('rate_limit_burst'),
+            max_in_flight=kwargs.get('max_in_flight'))
+        self.limiters = {}
+        self.limiters_lock = threading.Lock()
+
+    def limiter(self, url):
+        """ Return the ``NodeLimiter`` of the node at ``url``. """
+        with self.limiters_lock:
+            if url not in self.limiters:
+                self.limiters[url] = NodeLimiter(**self.limiter_options)
+            return self.limiters[url]
+
+    @staticmethod
+    def _node_downgraded(url):
+        return url in BaseHttpClient.non_appbase_nodes
 
-    def _downgrade_curr_node(self):
-        HttpClient.non_appbase_nodes.add(self.url)
+    @staticmethod
+    def _downgrade_node(url):
+        BaseHttpClient.non_appbase_nodes.add(url)
 
     def _is_error_recoverable(self, error):
         assert 'message' in error, "missing error msg key: {}".format(error)
@@ -137,20 +230,41 @@ class HttpClient(object):
         return False
 
     def next_node(self):
-        """ Switch to the next available node.
+        """ Switch ``self.url`` to the next available node.
+
+        The fallback is the healthiest other node, as ranked by
+        ``self.scheduler``. Calls pick their node with ``select_node()``
+        and fail over on their own; ``self.url`` is only the default of
+        lower level helpers like ``_post()``.
+
+        """
+        self.set_node(self.scheduler.best(exclude=(self.url,)))
 
-        This method will change base URL of our requests.
+    def select_node(self):
+        """ Return the URL of the healthiest node, to route the next
+        request to.
 
-        Use it when the current node goes down to change to a fallback
-        node.
+        Requests keep the URL they were sent to, instead of reading
+        ``self.url``, so that concurrent calls do not move each other to
+        another node or blame it for their failures.
 
         """
-        self.set_node(next(self.nodes))
+        for url in self.scheduler.probes_due():
+            self._start_probe(url)
+        return self.scheduler.best()
+
+    def _start_probe(self, url):
+        """ Send a probe request to ``url`` in the background. """
+        raise NotImplementedError
+
+    def _probe_body(self, url):
+        return self.codec.dumps(BaseHttpClient.json_rpc_body(
+            'get_dynamic_global_properties', **self._body_kwargs({}, url)))
 
     def set_node(self, node_url):
         """ Change current node to provided node URL. """
+        self.scheduler.add_node(node_url)
         self.url = node_url
-        self.request = partial(self.http.urlopen, 'POST', self.url)
 
     @property
     def hostname(self):
@@ -206,126 +320,129 @@ class HttpClient(object):
                     'params': params}
 
         if as_json:
-            return json.dumps(body, ensure_ascii=False).encode('utf8')
+            return default_codec.dumps(body)
 
         return body
 
-    def call(self,
-             name,
-             *args,
-             **kwargs):
-        """ Call a remote procedure in steemd.
-
-        Warnings:
+    def _rpc_error(self, error, name, url):
+        """ Build the exception to be raised for a JSON-RPC error object
+        returned by the node at ``url``.
 
-            This command will auto-retry in case of node failure, as well
-            as handle node fail-over.
+        Returns ``None`` if the error was caused by a legacy (pre-appbase)
+        node rejecting `condenser_api`; in that case the node is
+        downgraded and the request should simply be retried.
 
         """
-
-        # tuple of Exceptions which are eligible for retry
-        retry_exceptions = (MaxRetryError, ReadTimeoutError,
-                            ProtocolError, RPCErrorRecoverable,)
-
-        if sys.version > '3.5':
-            retry_exceptions += (json.decoder.JSONDecodeError, RemoteDisconnected,)
-        else:
-            retry_exceptions += (ValueError,)
-
-        if sys.version > '3.0':
-            retry_exceptions += (ConnectionResetError,)
+        hostname = urlparse(url).hostname
+        # jussi could not get a response from its upstream in time
+        if error.get('code') == 1100:
+            self.limiter(url).record_throttled()
+
+        # legacy (pre-appbase) nodes always return err code 1
+        legacy = error['code'] == 1
+        detail = error['message']
+
+        # some errors have no data key (db lock error)
+        if 'data' not in error:
+            error_name = 'error'
+        # some errors have no name key (jussi errors)
+        elif 'name' not in error['data']:
+            if 'exception' in error['data']:
+                error_name = error['data']['exception']
+            else:
+                error_name = 'unspecified error'
         else:
-            retry_exceptions += (HTTPException,)
-
-        tries = 0
-        while True:
-            try:
-
-                body_kwargs = kwargs.copy()
-                if not self._curr_node_downgraded():
-                    body_kwargs['api'] = 'condenser_api'
+            error_name = error['data']['name']
 
-                body = HttpClient.json_rpc_body(name, *args, **body_kwargs)
-                response = self.request(body=body)
+        if legacy:
+            detail = ":".join(detail.split("\n")[0:2])
+            if not self._node_downgraded(url):
+                self._downgrade_node(url)
+                logging.error('Downgrade-retry %s', hostname)
+                return None
 
-                success_codes = tuple(list(response.REDIRECT_STATUSES) + [200])
-                if response.status not in success_codes:
-                    raise RPCErrorRecoverable("non-200 response: %s from %s"
-                                              % (response.status, self.hostname))
+        detail = ('%s from %s (%s) in %s' % (
+            error_name, hostname, detail, name))
 
-                result = json.loads(response.data.decode('utf-8'))
-                assert result, 'result entirely blank'
+        if self._is_error_recoverable(error):
+            return RPCErrorRecoverable(detail)
+        return RPCError(detail)
 
-                if 'error' in result:
-                    # legacy (pre-appbase) nodes always return err code 1
-                    legacy = result['error']['code'] == 1
-                    detail = result['error']['message']
-
-                    # some errors have no data key (db lock error)
-                    if 'data' not in result['error']:
-                        error = 'error'
-                    # some errors have no name key (jussi errors)
-                    elif 'name' not in result['error']['data']:
-                        if 'exception' in error['data']:
-                            error = error['data']['exception']
-                        else:
-                            error = 'unspecified error'
-                    else:
-                        error = result['error']['data']['name']
-
-                    if legacy:
-                        detail = ":".join(detail.split("\n")[0:2])
-                        if not self._curr_node_downgraded():
-                            self._downgrade_curr_node()
-                            logging.error('Downgrade-retry %s', self.hostname)
-                            continue
+    def _body_kwargs(self, kwargs, url):
+        body_kwargs = kwargs.copy()
+        body_kwargs['as_json'] = False
+        if not self._node_downgraded(url):
+            body_kwargs['api'] = 'condenser_api'
+        return body_kwargs
 
-                    detail = ('%s from %s (%s) in %s' % (
-                        error, self.hostname, detail, name))
+    def _retry_backoff(self, tries, e):
+        """ Decide whether a failed request should be retried.
 
-                    if self._is_error_recoverable(result['error']):
-                        raise RPCErrorRecoverable(detail)
-                    else:
-                        raise RPCError(detail)
+        Re-raises ``e`` when ``self.retry_policy`` does not allow another
+        attempt, otherwise returns the new number of tries and the number
+        of seconds to wait before the next attempt.
 
-                return result['result']
-
-            except retry_exceptions as e:
-                if e == ValueError and 'JSON' not in e.args[0]:
-                    raise e  # (python<3.5 lacks json.decoder.JSONDecodeError)
-                if tries >= 10:
-                    logging.error('Failed after %d attempts -- %s: %s',
-                                  tries, e.__class__.__name__, e)
-                    raise e
-                tries += 1
-                logging.warning('Retry in %ds -- %s: %s', tries,
-                                e.__class__.__name__, e)
-                time.sleep(tries)
-                self.next_node()
+        """
+        tries += 1
+        if not self.retry_policy.allow(tries, e):
+            logging.error('Failed after %d attempts -- %s: %s',
+                          tries, e.__class__.__name__, e)
+            raise e
+        delay = self.retry_policy.backoff(tries)
+        logging.warning('Retry in %.2fs -- %s: %s', delay,
+                        e.__class__.__name__, e)
+        return tries, delay
+
+    def _observe_result(self, name, result, url):
+        """ Let the scheduler learn node head blocks from normal traffic.
+        """
+        if name == 'get_dynamic_global_properties' and result:
+            self.scheduler.record_head_block(
+                url, result.get('head_block_number'))
+
+    def _batch_body(self, calls, pending, url):
+        body = []
+        for idx in pending:
+            name, args, kwargs = calls[idx]
+            body_kwargs = self._body_kwargs(kwargs, url)
+            body_kwargs['_id'] = idx
+            body.append(BaseHttpClient.json_rpc_body(name, *args,
+                                                     **body_kwargs))
+        return self.codec.dumps(body)
+
+    def _batch_results(self, response, calls, pending, results, url):
+        # a single error object means the batch as a whole was rejected
+        if isinstance(response, dict):
+            if 'error' not in response:
+                raise RPCErrorRecoverable('invalid batch response from %s'
+                                          % urlparse(url).hostname)
+            error = self._rpc_error(response['error'], 'batch', url)
+            if error is not None:
+                raise error
+            return pending
+
+        retry = set(pending)
+        for item in response:
+            idx = item.get('id')
+            if idx not in retry:
                 continue
+            if 'error' in item:
+                error = self._rpc_error(item['error'], calls[idx][0], url)
+                if error is None:
+                    # the node was downgraded; the other entries failed
+                    # for the same reason, but would now raise
+                    return list(pending)
+                if isinstance(error, RPCErrorRecoverable):
+                    continue
+                raise error
+            results[idx] = item['result']
+            retry.remove(idx)
+
+        return sorted(retry)
 
-            # TODO: unclear why this case is here; need to explicitly
-            #       define exceptions for which we refuse to retry.
-            except Exception as e:
-                extra = dict(err=e, request=self.request)
-                logger.error('Unexpected exception! Please report at ' +
-                             'https://github.com/steemit/steem-python/issues' +
-                             ' -- %s: %s', e.__class__.__name__, e, extra=extra)
-                raise e
-
-    def call_multi_with_futures(self, name, params, api=None,
-                                max_workers=None):
-        with concurrent.futures.ThreadPoolExecutor(
-                max_workers=max_workers) as executor:
-            # Start the load operations and mark each future with its URL
-            def ensure_list(val):
-                return val if isinstance(val, (list, tuple, set)) else [val]
-
-            futures = (executor.submit(
-                self.call, name, *ensure_list(param), api=api)
-                for param in params)
-            for future in concurrent.futures.as_completed(futures):
-                yield future.result()
+    @staticmethod
+    def _normalize_call(name, args=(), kwargs=None):
+        return name, args, kwargs or {}
 
     def sanitize_nodes(self, nodes):
         """
@@ -364,3 +481,453 @@ class HttpClient(object):
     def _isString(self, input):
         return isinstance(input, str) or \
                (sys.version < '3.0' and isinstance(input, unicode))
+
+
+class HttpClient(BaseHttpClient):
+    """ Simple Steem JSON-HTTP-RPC API
+
+    This class serves as an abstraction layer for easy use of the Steem API.
+
+    Args:
+      nodes (list): A list of Steem HTTP RPC nodes to connect to.
+      node_quarantine (float): Seconds a node is skipped after its circuit
+        breaker opened. Doubles every time the breaker re-opens.
+      node_quarantine_max (float): Upper bound of ``node_quarantine``.
+      node_failure_threshold (int): Consecutive failures after which the
+        circuit breaker of a node opens. Once ``node_quarantine`` expired,
+        a single ``get_dynamic_global_properties`` probe decides whether
+        the node is used again.
+      rate_limit (float): Maximum requests per second sent to each node.
+        Defaults to no limit.
+      rate_limit_burst (float): Token bucket size of ``rate_limit``.
+      max_in_flight (int): Maximum concurrent requests to each node.
+        Defaults to no limit.
+        Nodes which answer with HTTP 429/503 or jussi error 1100 are
+        backed off from adaptively; see ``steembase.rate_limit``.
+      retry_policy (RetryPolicy): Backoff, retry budget and per-exception
+        handling of failed requests. See ``steembase.retry.RetryPolicy``.
+      max_retries (int): Shortcut to set the maximum number of retries of
+        the default ``RetryPolicy``. Defaults to 10.
+      json_codec (str, JsonCodec): JSON codec used to encode requests and
+        decode responses. Defaults to the fastest one installed (orjson,
+        ujson or json). See ``steembase.json_codec``.
+      hedge (bool): Enable hedged requests for read-only calls: when the
+        first node is slower than ``hedge_percentile`` of recent calls,
+        the request is also sent to a second node, and the first answer
+        wins. Defaults to False.
+      hedge_percentile (float): Latency percentile after which a request
+        is hedged. Defaults to 95.
+      hedge_delay (float): Hedging delay in seconds, used until enough
+        latencies have been observed. Defaults to 1.
+      hedge_methods (list): Calls eligible for hedging. Defaults to
+        ``HEDGE_METHODS``.
+
+    Every call is routed to the healthiest node, as ranked by latency,
+    error rate and head block lag (see ``NodeScheduler``).
+
+    .. code-block:: python
+
+       from steem.http_client import HttpClient
+
+       rpc = HttpClient(['https://steemd-node1.com',
+       'https://steemd-node2.com'])
+
+    any call available to that port can be issued using the instance
+    via the syntax ``rpc.call('command', *parameters)``.
+
+    Example:
+
+    .. code-block:: python
+
+       rpc.call(
+           'get_followers',
+           'furion', 'abit', 'blog', 10,
+           api='follow_api'
+       )
+
+    """
+
+    def __init__(self, nodes, **kwargs):
+        self.hedge = kwargs.get('hedge', False)
+        self.hedge_methods = set(kwargs.get('hedge_methods', HEDGE_METHODS))
+        self.hedge_percentile = kwargs.get('hedge_percentile', 95)
+        self.hedge_delay = kwargs.get('hedge_delay', 1)
+        self._hedge_executor = None
+        self._latencies = deque(maxlen=200)
+
+        num_pools = kwargs.get('num_pools', 10)
+        maxsize = kwargs.get('maxsize', 10)
+        timeout = kwargs.get('timeout', 60)
+        # retries are handled by self.retry_policy, not by urllib3
+        retries = kwargs.get('retries',
+                             Retry(total=0, raise_on_redirect=False))
+        pool_block = kwargs.get('pool_block', False)
+        tcp_keepalive = kwargs.get('tcp_keepalive', True)
+
+        if tcp_keepalive:
+            socket_options = HTTPConnection.default_socket_options + \
+                             [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1), ]
+        else:
+            socket_options = HTTPConnection.default_socket_options
+
+        self.http = urllib3.poolmanager.PoolManager(
+            num_pools=num_pools,
+            maxsize=maxsize,
+            block=pool_block,
+            timeout=timeout,
+            retries=retries,
+            socket_options=socket_options,
+            headers={'Content-Type': 'application/json'},
+            cert_reqs='CERT_REQUIRED',
+            ca_certs=certifi.where())
+        '''
+            urlopen(method, url, body=None, headers=None, retries=None,
+            redirect=True, assert_same_host=True, timeout=<object object>,
+            pool_timeout=None, release_conn=None, chunked=False, body_pos=None,
+            **response_kw)
+        '''
+
+        self.request = None
+        super(HttpClient, self).__init__(nodes, **kwargs)
+
+    def _start_probe(self, url):
+        probe = threading.Thread(target=self._probe, args=(url,))
+        probe.daemon = True
+        probe.start()
+
+    def _probe(self, url):
+        """ Send a lightweight request to a node whose circuit breaker is
+        half-open; its outcome decides whether the node is used again. """
+        try:
+            result = self._post(self._probe_body(url), url)['result']
+            self.scheduler.record_head_block(
+                url, result.get('head_block_number'))
+        except Exception as e:
+            logger.debug('Probe of %s failed -- %s: %s', url,
+                         e.__class__.__name__, e)
+            self.scheduler.record_failure(url)
+
+    def set_node(self, node_url):
+        """ Change current node to provided node URL. """
+        super(HttpClient, self).set_node(node_url)
+        self.request = partial(self.http.urlopen, 'POST', self.url)
+
+    def _post(self, body, url=None):
+        """ POST a request body to a node and decode the reply.
+
+        Uses the current node unless ``url`` is given. Raises
+        ``RPCErrorRecoverable`` on non-200 responses so that the caller
+        can retry and fail over. JSON-RPC error replies are returned, but
+        not counted as a success of the node.
+
+        """
+        url = url or self.url
+        limiter = self.limiter(url)
+        with limiter:
+            start = time.time()
+            response = self.http.urlopen('POST', url, body=body)
+
+        if response.status in THROTTLE_STATUSES:
+            limiter.record_throttled()
+
+        success_codes = tuple(list(response.REDIRECT_STATUSES) + [200])
+        if response.status not in success_codes:
+            raise RPCErrorRecoverable("non-200 response: %s from %s"
+                                      % (response.status,
+                                         urlparse(url).hostname))
+
+        result = self.codec.loads(response.data)
+        assert result, 'result entirely blank'
+        latency = time.time() - start
+        limiter.record_success()
+        self._latencies.append(latency)
+        if not (isinstance(result, dict) and 'error' in result):
+            self.scheduler.record_success(url, latency)
+        return result
+
+    def _hedge_delay(self):
+        """ Seconds to wait for the first node before hedging, ie. the
+        ``hedge_percentile`` of recently observed latencies. """
+        samples = sorted(self._latencies)
+        if len(samples) < 20:
+            return self.hedge_delay
+        rank = int(len(samples) * self.hedge_percentile / 100.0)
+        return samples[min(rank, len(samples) - 1)]
+
+    def _post_hedged(self, body, url=None):
+        """ POST to a node, and if it did not answer within
+        ``_hedge_delay()`` seconds, send the same request to a second node.
+
+        Returns the URL of the node which answered and its reply. The
+        first reply wins, unless it is a JSON-RPC error while the other
+        node may still answer.
+        """
+        url = url or self.url
+        if self._hedge_executor is None:
+            self._hedge_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers)
+
+        primary = self._hedge_executor.submit(self._post, body, url)
+        try:
+            return url, primary.result(timeout=self._hedge_delay())
+        except concurrent.futures.TimeoutError:
+            pass
+
+        second_url = self.scheduler.best(exclude=(url,))
+        if second_url == url:
+            return url, primary.result()
+
+        logger.debug('Hedging request to %s', second_url)
+        urls = {primary: url,
+                self._hedge_executor.submit(self._post, body, second_url):
+                    second_url}
+        pending = set(urls)
+        errors = []
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    continue
+                if 'error' in future.result():
+                    errors.append((urls[future], future.result()))
+                else:
+                    return urls[future], future.result()
+        if errors:
+            return errors[0]
+        # both nodes failed
+        return url, primary.result()
+
+    def _retry_wait(self, tries, e, url):
+        """ Record the failure of a request to ``url``, sleep before the
+        next attempt and decide which node it goes to, as decided by
+        ``self.retry_policy``.
+
+        Returns the new number of tries and the URL to retry with.
+        """
+        self.scheduler.record_failure(url)
+        tries, delay = self._retry_backoff(tries, e)
+        time.sleep(delay)
+        if self.retry_policy.classify(e) == FAILOVER:
+            url = self.scheduler.best(exclude=(url,))
+        return tries, url
+
+    def call(self,
+             name,
+             *args,
+             **kwargs):
+        """ Call a remote procedure in steemd.
+
+        Warnings:
+
+            This command will auto-retry in case of node failure, as well
+            as handle node fail-over.
+
+        """
+        url = self.select_node()
+        tries = 0
+        while True:
+            try:
+                body = self.codec.dumps(HttpClient.json_rpc_body(
+                    name, *args, **self._body_kwargs(kwargs, url)))
+                if self.hedge and name in self.hedge_methods:
+                    # errors and results belong to the node which answered
+                    url, result = self._post_hedged(body, url)
+                else:
+                    result = self._post(body, url)
+
+                if 'error' in result:
+                    error = self._rpc_error(result['error'], name, url)
+                    if error is None:
+                        continue
+                    raise error
+
+                self._observe_result(name, result['result'], url)
+                return result['result']
+
+            except RETRY_EXCEPTIONS as e:
+                tries, url = self._retry_wait(tries, e, url)
+                continue
+
+            # TODO: unclear why this case is here; need to explicitly
+            #       define exceptions for which we refuse to retry.
+            except Exception as e:
+                extra = dict(err=e, request=self.request)
+                logger.error('Unexpected exception! Please report at ' +
+                             'https://github.com/steemit/steem-python/issues' +
+                             ' -- %s: %s', e.__class__.__name__, e, extra=extra)
+                raise e
+
+    def call_stream(self, name, *args, **kwargs):
+        """ Call a remote procedure in steemd, and yield the items of its
+        result array as they are parsed off the socket.
+
+        Peak memory stays bounded by the largest single item instead of
+        the whole response, and processing can start before the full
+        payload has arrived. Results which are not arrays are yielded
+        as a single item.
+
+        Warnings:
+
+            Requests are retried like in ``call()``, but only as long as
+            no item was yielded yet.
+
+        Example:
+
+        .. code-block:: python
+
+           for item in rpc.call_stream('get_account_history',
+                                       'furion', -1, 10000,
+                                       api='database_api'):
+               print(item)
+
+        """
+        chunk_size = kwargs.pop('chunk_size', 2 ** 16)
+        url = self.select_node()
+        tries = 0
+        while True:
+            yielded = False
+            try:
+                body = self.codec.dumps(HttpClient.json_rpc_body(
+                    name, *args, **self._body_kwargs(kwargs, url)))
+                limiter = self.limiter(url)
+                limiter.acquire()
+                try:
+                    start = time.time()
+                    response = self.http.urlopen(
+                        'POST', url, body=body, preload_content=False)
+                except Exception:
+                    limiter.release()
+                    raise
+                complete = False
+                try:
+                    if response.status in THROTTLE_STATUSES:
+                        limiter.record_throttled()
+                    if response.status != 200:
+                        raise RPCErrorRecoverable(
+                            "non-200 response: %s from %s"
+                            % (response.status, urlparse(url).hostname))
+
+                    parser = ResultStreamParser(self.codec.loads)
+                    for chunk in response.stream(chunk_size):
+                        for item in parser.feed(chunk):
+                            yielded = True
+                            yield item
+                    complete = True
+                finally:
+                    if not complete:
+                        # do not return a half-read connection to the pool
+                        response.close()
+                    response.release_conn()
+                    limiter.release()
+
+                if not parser.streamed:
+                    result = self.codec.loads(parser.document)
+                    if 'error' in result:
+                        error = self._rpc_error(result['error'], name, url)
+                        if error is None:
+                            continue
+                        raise error
+                    yield result['result']
+
+                self.scheduler.record_success(url, time.time() - start)
+                return
+
+            except RETRY_EXCEPTIONS as e:
+                if yielded:
+                    raise e
+                tries, url = self._retry_wait(tries, e, url)
+
+    def call_batch(self, calls, batch_size=50):
+        """ Call many remote procedures using JSON-RPC 2.0 batch requests.
+
+        Calls are packed into JSON arrays of up to ``batch_size`` requests,
+        so that each HTTP POST carries many calls. Responses are matched
+        back to their requests by ``id``. When some entries of a batch fail
+        with a recoverable error, only those entries are retried.
+
+        Args:
+
+            calls (list): A list of ``(name, args, kwargs)`` tuples. ``args``
+            and ``kwargs`` may be omitted, ie. ``('get_block', [1])`` or
+            ``('get_config',)``.
+
+            batch_size (int): Maximum number of calls sent in one request.
+
+        Returns:
+
+            list: Results, in the same order as ``calls``.
+
+        Example:
+
+        .. code-block:: python
+
+           rpc.call_batch([
+               ('get_block', [1], {'api': 'database_api'}),
+               ('get_block', [2], {'api': 'database_api'}),
+           ])
+
+        """
+        calls = [self._normalize_call(*c) for c in calls]
+        results = [None] * len(calls)
+
+        url = self.select_node()
+        for offset in range(0, len(calls), batch_size):
+            pending = list(range(offset, min(offset + batch_size,
+                                             len(calls))))
+            tries = 0
+            while pending:
+                try:
+                    legacy = self._node_downgraded(url)
+                    pending = self._call_batch_once(calls, pending, results,
+                                                    url)
+                    if pending and legacy != self._node_downgraded(url):
+                        # resend everything in the legacy format at once
+                        continue
+                    if pending:
+                        raise RPCErrorRecoverable(
+                            '%d of batch failed on %s'
+                            % (len(pending), urlparse(url).hostname))
+                except RETRY_EXCEPTIONS as e:
+                    tries, url = self._retry_wait(tries, e, url)
+
+        return results
+
+    def _call_batch_once(self, calls, pending, results, url):
+        """ Send one batch request, store results and return the indexes
+        of calls which need to be retried. """
+        response = self._post(self._batch_body(calls, pending, url), url)
+        return self._batch_results(response, calls, pending, results, url)
+
+    def call_multi_with_futures(self, name, params, api=None,
+                                max_workers=None):
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers or self.max_workers) as executor:
+            # Start the load operations and mark each future with its URL
+            def ensure_list(val):
+                return val if isinstance(val, (list, tuple, set)) else [val]
+
+            futures = (executor.submit(
+                self.call, name, *ensure_list(param), api=api)
+                for param in params)
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
+
+    def call_multi_ordered(self, name, params, api=None, max_workers=None,
+                           window=None):
+        """ Like ``call_multi_with_futures()``, but with results yielded
+        in the order of ``params``, and with at most ``window`` calls in
+        flight. ``params`` may be a generator; it is consumed lazily.
+
+        See ``imap_ordered()``.
+
+        """
+        def ensure_list(val):
+            return val if isinstance(val, (list, tuple, set)) else [val]
+
+        def fn(param):
+            return self.call(name, *ensure_list(param), api=api)
+
+        return imap_ordered(fn, params,
+                            max_workers=max_workers or self.max_workers or 10,
+                            window=window)
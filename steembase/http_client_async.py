@@ -0,0 +1,217 @@
+# coding=utf-8
+import asyncio
+import logging
+import time
+from urllib.parse import urlparse
+
+import aiohttp
+from steembase.exceptions import RPCErrorRecoverable
+from steembase.retry import FAILOVER
+
+from .http_client import (BaseHttpClient, RETRY_EXCEPTIONS,
+                          THROTTLE_STATUSES)
+
+logger = logging.getLogger(__name__)
+
+# tuple of Exceptions which are eligible for retry
+ASYNC_RETRY_EXCEPTIONS = RETRY_EXCEPTIONS + (aiohttp.ClientError,
+                                             asyncio.TimeoutError,)
+
+
+class AsyncHttpClient(BaseHttpClient):
+    """ Asyncio based Steem JSON-HTTP-RPC API
+
+    Routes, retries and fails over like ``HttpClient``, but ``call()``
+    and ``call_batch()`` are coroutines. All requests share a single
+    ``aiohttp`` connection pool, so thousands of calls can be in flight
+    from one event loop without spawning a thread for each of them.
+    ``rate_limit`` and ``max_in_flight`` are honoured without blocking
+    the event loop.
+
+    Streamed results (``HttpClient.call_stream()``) and hedged requests
+    are only available in ``HttpClient``.
+
+    Args:
+      nodes (list): A list of Steem HTTP RPC nodes to connect to.
+
+    .. code-block:: python
+
+       from steembase.http_client_async import AsyncHttpClient
+
+       async def main():
+           async with AsyncHttpClient(['https://api.steemit.com']) as rpc:
+               return await rpc.call('get_block', 1, api='database_api')
+
+    """
+
+    def __init__(self, nodes, **kwargs):
+        self.max_connections = kwargs.get('max_connections', 100)
+        self.timeout = kwargs.get('timeout', 60)
+        self.tcp_keepalive = kwargs.get('tcp_keepalive', True)
+
+        # the session has to be created from within a running event loop
+        self.session = None
+
+        super(AsyncHttpClient, self).__init__(nodes, **kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """ Close the underlying connection pool. """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _get_session(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                force_close=not self.tcp_keepalive)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                headers={'Content-Type': 'application/json'},
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self.session
+
+    def _start_probe(self, url):
+        asyncio.ensure_future(self._probe(url))
+
+    async def _probe(self, url):
+        try:
+            result = (await self._post(self._probe_body(url),
+                                       url))['result']
+            self.scheduler.record_head_block(
+                url, result.get('head_block_number'))
+        except Exception as e:
+            logger.debug('Probe of %s failed -- %s: %s', url,
+                         e.__class__.__name__, e)
+            self.scheduler.record_failure(url)
+
+    async def _acquire(self, limiter):
+        """ Wait for a slot of ``limiter`` without blocking the loop. """
+        while True:
+            delay = limiter.try_acquire()
+            if delay is None:
+                return
+            await asyncio.sleep(delay)
+
+    async def _post(self, body, url=None):
+        url = url or self.url
+        limiter = self.limiter(url)
+        await self._acquire(limiter)
+        try:
+            start = time.time()
+            session = self._get_session()
+            async with session.post(url, data=body) as response:
+                if response.status in THROTTLE_STATUSES:
+                    limiter.record_throttled()
+                if response.status != 200:
+                    raise RPCErrorRecoverable("non-200 response: %s from %s"
+                                              % (response.status,
+                                                 urlparse(url).hostname))
+                data = await response.read()
+        finally:
+            limiter.release()
+
+        result = self.codec.loads(data)
+        assert result, 'result entirely blank'
+        limiter.record_success()
+        if not (isinstance(result, dict) and 'error' in result):
+            self.scheduler.record_success(url, time.time() - start)
+        return result
+
+    async def _retry_wait(self, tries, e, url):
+        self.scheduler.record_failure(url)
+        tries, delay = self._retry_backoff(tries, e)
+        await asyncio.sleep(delay)
+        if self.retry_policy.classify(e) == FAILOVER:
+            url = self.scheduler.best(exclude=(url,))
+        return tries, url
+
+    async def call(self, name, *args, **kwargs):
+        """ Call a remote procedure in steemd.
+
+        Warnings:
+
+            This command will auto-retry in case of node failure, as well
+            as handle node fail-over.
+
+        """
+        url = self.select_node()
+        tries = 0
+        while True:
+            try:
+                body = self.codec.dumps(BaseHttpClient.json_rpc_body(
+                    name, *args, **self._body_kwargs(kwargs, url)))
+                result = await self._post(body, url)
+
+                if 'error' in result:
+                    error = self._rpc_error(result['error'], name, url)
+                    if error is None:
+                        continue
+                    raise error
+
+                self._observe_result(name, result['result'], url)
+                return result['result']
+
+            except ASYNC_RETRY_EXCEPTIONS as e:
+                tries, url = await self._retry_wait(tries, e, url)
+
+    async def call_batch(self, calls, batch_size=50):
+        """ Call many remote procedures using JSON-RPC 2.0 batch requests.
+
+        See ``HttpClient.call_batch()``. Batches are sent concurrently.
+
+        """
+        calls = [self._normalize_call(*c) for c in calls]
+        results = [None] * len(calls)
+
+        async def send(pending):
+            url = self.select_node()
+            tries = 0
+            while pending:
+                try:
+                    legacy = self._node_downgraded(url)
+                    response = await self._post(
+                        self._batch_body(calls, pending, url), url)
+                    pending = self._batch_results(response, calls, pending,
+                                                  results, url)
+                    if pending and legacy != self._node_downgraded(url):
+                        continue
+                    if pending:
+                        raise RPCErrorRecoverable(
+                            '%d of batch failed on %s'
+                            % (len(pending), urlparse(url).hostname))
+                except ASYNC_RETRY_EXCEPTIONS as e:
+                    tries, url = await self._retry_wait(tries, e, url)
+
+        await asyncio.gather(*[
+            send(list(range(offset, min(offset + batch_size, len(calls)))))
+            for offset in range(0, len(calls), batch_size)])
+
+        return results
+
+    async def call_multi_as_completed(self, name, params, api=None,
+                                      max_workers=None):
+        """ Asynchronously yield results of ``name`` called once for
+        every item in ``params``, as they complete; the counterpart of
+        ``HttpClient.call_multi_with_futures()``.
+
+        ``max_workers`` limits the number of calls in flight.
+
+        """
+        def ensure_list(val):
+            return val if isinstance(val, (list, tuple, set)) else [val]
+
+        semaphore = asyncio.Semaphore(max_workers or self.max_connections)
+
+        async def limited(param):
+            async with semaphore:
+                return await self.call(name, *ensure_list(param), api=api)
+
+        for future in asyncio.as_completed([limited(p) for p in params]):
+            yield await future
@@ -0,0 +1,105 @@
+# coding=utf-8
+import json
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+
+class JsonCodec(object):
+    """ A JSON encoder/decoder pair used for RPC requests and responses.
+
+    Args:
+        name (str): Name of the codec.
+        loads (callable): Decodes UTF-8 encoded ``bytes`` to Python objects.
+        dumps (callable): Encodes Python objects to UTF-8 encoded ``bytes``.
+        decode_errors (tuple): Exceptions raised by ``loads`` on invalid
+            input.
+
+    """
+
+    def __init__(self, name, loads, dumps, decode_errors=(ValueError,)):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+        self.decode_errors = decode_errors
+
+    def __repr__(self):
+        return '<JsonCodec %s>' % self.name
+
+
+def _stdlib_codec():
+    if sys.version >= '3.6':
+        loads = json.loads
+    else:
+        def loads(data):
+            return json.loads(data.decode('utf-8'))
+
+    def dumps(obj):
+        return json.dumps(obj, ensure_ascii=False).encode('utf8')
+
+    if sys.version >= '3.5':
+        decode_errors = (json.decoder.JSONDecodeError,)
+    else:
+        decode_errors = (ValueError,)
+
+    return JsonCodec('json', loads, dumps, decode_errors)
+
+
+def _orjson_codec():
+    import orjson
+    return JsonCodec('orjson', orjson.loads, orjson.dumps,
+                     (orjson.JSONDecodeError,))
+
+
+def _ujson_codec():
+    import ujson
+    if not hasattr(ujson, 'JSONDecodeError'):
+        # old versions raise plain ValueError, which is too broad to retry
+        raise ImportError('ujson is too old')
+
+    def dumps(obj):
+        return ujson.dumps(obj, ensure_ascii=False).encode('utf8')
+
+    return JsonCodec('ujson', ujson.loads, dumps, (ujson.JSONDecodeError,))
+
+
+# in order of preference
+_codec_factories = [
+    ('orjson', _orjson_codec),
+    ('ujson', _ujson_codec),
+    ('json', _stdlib_codec),
+]
+
+codecs = {}
+for _name, _factory in _codec_factories:
+    try:
+        codecs[_name] = _factory()
+    except ImportError:
+        pass
+
+#: the fastest codec installed
+default_codec = next(codecs[name] for name, _ in _codec_factories
+                     if name in codecs)
+
+#: exceptions raised by any of the installed codecs on invalid JSON
+DECODE_ERRORS = tuple(e for codec in codecs.values()
+                      for e in codec.decode_errors)
+
+
+def get_codec(codec=None):
+    """ Resolve ``codec`` to a ``JsonCodec``.
+
+    Args:
+        codec (None, str, JsonCodec): ``None`` for the fastest installed
+            codec, a codec name (``'orjson'``, ``'ujson'``, ``'json'``) or
+            a ``JsonCodec`` instance.
+
+    """
+    if codec is None:
+        return default_codec
+    if isinstance(codec, JsonCodec):
+        return codec
+    if codec not in codecs:
+        raise ValueError('JSON codec %s is not installed' % codec)
+    return codecs[codec]
@@ -0,0 +1,109 @@
+# coding=utf-8
+import re
+
+# characters which matter outside of / inside of JSON strings
+_STRUCTURE = re.compile(b'["\\[\\]{},]')
+_IN_STRING = re.compile(b'["\\\\]')
+
+
+class ResultStreamParser(object):
+    """ Incrementally parse the ``result`` array of a JSON-RPC response.
+
+    Bytes are fed in as they arrive from the socket, and every item of the
+    top-level ``result`` array is decoded and returned as soon as it is
+    complete. Bytes of items which were already returned are discarded,
+    so peak memory is bounded by the size of the largest item rather than
+    by the size of the response.
+
+    Responses whose ``result`` is not an array (ie. errors or objects)
+    are kept whole; ``streamed`` is False for them and the complete
+    response is available as ``document`` after the last ``feed()``.
+
+    Args:
+        loads (callable): Decodes a single JSON value from ``bytes``.
+
+    """
+
+    def __init__(self, loads):
+        self.loads = loads
+        self.buffer = b''
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.string_start = 0
+        self.last_string = None
+        self.item_start = None
+        #: True once the ``result`` array was found
+        self.streamed = False
+        #: True once the ``result`` array was parsed completely
+        self.done = False
+
+    @property
+    def document(self):
+        return self.buffer
+
+    def feed(self, chunk):
+        """ Parse the next chunk of the response. Returns a list of
+        decoded ``result`` items which were completed by this chunk. """
+        self.buffer += chunk
+        if self.done:
+            return []
+
+        items = []
+        buf = self.buffer
+        while True:
+            if self.in_string:
+                m = _IN_STRING.search(buf, self.pos)
+                if not m:
+                    self.pos = len(buf)
+                    break
+                if m.group() == b'\\':
+                    if m.end() >= len(buf):
+                        # escaped character is in the next chunk
+                        self.pos = m.start()
+                        break
+                    self.pos = m.end() + 1
+                    continue
+                self.in_string = False
+                self.pos = m.end()
+                if self.depth == 1:
+                    self.last_string = buf[self.string_start:m.start()]
+                continue
+
+            m = _STRUCTURE.search(buf, self.pos)
+            if not m:
+                self.pos = len(buf)
+                break
+            char = m.group()
+            self.pos = m.end()
+
+            if char == b'"':
+                self.in_string = True
+                self.string_start = self.pos
+            elif char in b'[{':
+                self.depth += 1
+                if self.depth == 2 and char == b'[' and \
+                        self.last_string == b'result' and not self.streamed:
+                    self.streamed = True
+                    self.item_start = self.pos
+            elif char in b']}':
+                if self.item_start is not None and self.depth == 2:
+                    item = buf[self.item_start:m.start()].strip()
+                    if item:
+                        items.append(self.loads(item))
+                    self.item_start = None
+                    self.done = True
+                    break
+                self.depth -= 1
+            elif self.item_start is not None and self.depth == 2:
+                items.append(self.loads(buf[self.item_start:m.start()]))
+                self.item_start = self.pos
+
+        if self.item_start is not None:
+            # drop everything which was already returned
+            self.buffer = buf[self.item_start:]
+            self.pos -= self.item_start
+            self.string_start -= self.item_start
+            self.item_start = 0
+
+        return items
@@ -0,0 +1,226 @@
+# coding=utf-8
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+#: node is in use
+CLOSED = 'closed'
+#: node failed and is skipped until its reset timeout expired
+OPEN = 'open'
+#: a probe request decides whether the node can be used again
+HALF_OPEN = 'half-open'
+
+
+class CircuitBreaker(object):
+    """ Remembers that a node is down.
+
+    The breaker opens after ``failure_threshold`` consecutive failures.
+    Once ``reset_timeout`` expired, a single probe request is allowed
+    (half-open state): if it succeeds the breaker closes again, if it
+    fails the breaker re-opens with a doubled timeout.
+
+    Args:
+        failure_threshold (int): Consecutive failures which open the
+            breaker.
+        reset_timeout (float): Seconds the breaker stays open at first.
+        reset_timeout_max (float): Upper bound of the reset timeout.
+
+    """
+
+    def __init__(self,
+                 failure_threshold=1,
+                 reset_timeout=1,
+                 reset_timeout_max=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.reset_timeout_max = reset_timeout_max
+
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0
+
+    def allow_request(self):
+        return self.state == CLOSED
+
+    def probe_due(self, now=None):
+        return self.state == OPEN and self.open_until <= (now or time.time())
+
+    def start_probe(self):
+        self.state = HALF_OPEN
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0
+
+    def record_failure(self):
+        """ Returns the number of seconds the breaker opened for, if it
+        opened. """
+        self.failures += 1
+        if self.state == HALF_OPEN or \
+                self.failures >= self.failure_threshold:
+            self.trips += 1
+            timeout = min(self.reset_timeout * 2 ** (self.trips - 1),
+                          self.reset_timeout_max)
+            self.state = OPEN
+            self.open_until = time.time() + timeout
+            return timeout
+
+
+class NodeHealth(object):
+    """ Health statistics of a single RPC node.
+
+    Args:
+        url (str): Node URL.
+        breaker (CircuitBreaker): Circuit breaker of this node.
+        alpha (float): Smoothing factor of the moving averages.
+
+    """
+
+    def __init__(self, url, breaker, alpha=0.2):
+        self.url = url
+        self.breaker = breaker
+        self.alpha = alpha
+
+        #: exponentially weighted moving average of latency, in seconds
+        self.latency = None
+        #: exponentially weighted moving average of the failure rate
+        self.error_rate = 0.0
+        #: newest head block reported by this node
+        self.head_block = None
+
+    def record_success(self, latency):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.alpha * (latency - self.latency)
+        self.error_rate *= (1 - self.alpha)
+        self.breaker.record_success()
+
+    def record_failure(self):
+        self.error_rate += self.alpha * (1 - self.error_rate)
+        return self.breaker.record_failure()
+
+
+class NodeScheduler(object):
+    """ Pick the best node to send the next request to.
+
+    Every node is scored by its smoothed latency, plus penalties for its
+    recent error rate and for how far its head block lags behind the best
+    known head block. Nodes which fail have their ``CircuitBreaker`` opened, and
+    are skipped until a probe request succeeded, unless the breakers of
+    all nodes are open.
+
+    Nodes without a successful request are assumed to have a latency of
+    ``latency_prior``. The default of 0 makes nodes which were never used
+    score best, so that every node gets a chance to report its latency,
+    while the error penalty still ranks nodes which only failed behind
+    working ones. Ties go to the node listed first.
+
+    Args:
+        nodes (list): A list of node URLs.
+        quarantine (float): Seconds a breaker stays open after it tripped
+            for the first time. Doubles with every consecutive trip.
+        quarantine_max (float): Upper bound of the above, in seconds.
+        failure_threshold (int): Consecutive failures which open a breaker.
+        block_interval (float): Seconds of latency a node is penalized for
+            every block it lags behind.
+        error_penalty (float): Seconds of latency a node is penalized for
+            an error rate of 1, ie. for failing every request.
+        latency_prior (float): Latency assumed for nodes which have not
+            answered yet, in seconds.
+
+    """
+
+    def __init__(self,
+                 nodes,
+                 quarantine=1,
+                 quarantine_max=60,
+                 failure_threshold=1,
+                 block_interval=3,
+                 error_penalty=1,
+                 latency_prior=0.0):
+        self.quarantine = quarantine
+        self.quarantine_max = quarantine_max
+        self.failure_threshold = failure_threshold
+        self.block_interval = block_interval
+        self.error_penalty = error_penalty
+        self.latency_prior = latency_prior
+        self.health = {}
+        self.order = []
+        self.lock = threading.Lock()
+        for url in nodes:
+            self.add_node(url)
+
+    def add_node(self, url):
+        with self.lock:
+            if url not in self.health:
+                self.health[url] = NodeHealth(url, CircuitBreaker(
+                    failure_threshold=self.failure_threshold,
+                    reset_timeout=self.quarantine,
+                    reset_timeout_max=self.quarantine_max))
+                self.order.append(url)
+            return self.health[url]
+
+    def score(self, node):
+        """ Lower is better. """
+        latency = node.latency
+        if latency is None:
+            latency = self.latency_prior
+        score = latency + self.error_penalty * node.error_rate
+        head_blocks = [n.head_block for n in self.health.values()
+                       if n.head_block is not None]
+        if node.head_block is not None and head_blocks:
+            lag = max(head_blocks) - node.head_block
+            score += lag * self.block_interval
+        return score
+
+    def best(self, exclude=()):
+        """ Return the URL of the best node to use, skipping ``exclude``
+        unless there is no other node. """
+        with self.lock:
+            candidates = [self.health[url] for url in self.order
+                          if url not in exclude] or \
+                [self.health[url] for url in self.order]
+            healthy = [n for n in candidates if n.breaker.allow_request()]
+            if not healthy:
+                # every breaker is open; use whatever recovers first
+                return min(candidates,
+                           key=lambda n: n.breaker.open_until).url
+            return min(healthy, key=self.score).url
+
+    def probes_due(self):
+        """ Return URLs of nodes whose breaker is ready for a probe
+        request, and move those breakers into the half-open state. """
+        with self.lock:
+            now = time.time()
+            due = [self.health[url] for url in self.order
+                   if self.health[url].breaker.probe_due(now)]
+            for node in due:
+                node.breaker.start_probe()
+            return [node.url for node in due]
+
+    def record_success(self, url, latency):
+        with self.lock:
+            node = self.health.get(url)
+            if node:
+                node.record_success(latency)
+
+    def record_failure(self, url):
+        with self.lock:
+            node = self.health.get(url)
+            if node:
+                timeout = node.record_failure()
+                if timeout:
+                    logger.debug('Circuit of %s open for %ss', url, timeout)
+
+    def record_head_block(self, url, head_block):
+        with self.lock:
+            node = self.health.get(url)
+            if node:
+                node.head_block = head_block
@@ -60,3 +60,35 @@ op_names = [
 
 #: assign operation ids
 operations = dict(zip(op_names, range(len(op_names))))
+
+#: virtual operations; these are generated by the chain itself and are only
+#: returned by ``get_ops_in_block``, never included in blocks
+virtual_op_names = op_names[op_names.index('fill_convert_request'):]
+
+
+#: operations whose id is the same on every node version, and which can
+#: therefore be selected by ``get_account_history`` operation filters;
+#: HF20 replaced ids 22 and 23, and HF21 inserted operations before the
+#: virtual ones
+filterable_operations = dict(
+    (name, op_id) for name, op_id in operations.items()
+    if op_id < operations['fill_convert_request'] and
+    name not in ('challenge_authority', 'prove_authority'))
+
+
+def operation_filter(names):
+    """ Return the ``(operation_filter_low, operation_filter_high)``
+    bitmasks which make ``get_account_history`` return only the
+    operations ``names``. Bit ``n`` of the 128 bit mask selects the
+    operation with id ``n``.
+
+    Raises ``KeyError`` for names not in ``filterable_operations``.
+    """
+    low = high = 0
+    for name in names:
+        op_id = filterable_operations[name]
+        if op_id < 64:
+            low |= 1 << op_id
+        else:
+            high |= 1 << (op_id - 64)
+    return low, high
@@ -0,0 +1,120 @@
+# coding=utf-8
+import logging
+import threading
+import time
+
+from steembase.retry import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class NodeLimiter(object):
+    """ Client side rate limiter and concurrency governor of one node.
+
+    Requests wait for a token of a token bucket refilled at ``rate``
+    requests per second, and for a free slot out of ``max_in_flight``.
+    When the node signals that it is overloaded (HTTP 429/503 or a jussi
+    ``1100`` error), the rate is halved and all requests to the node
+    pause for a backoff which doubles while throttling continues. Every
+    successful request then raises the rate again by a small step, up to
+    the configured ``rate``.
+
+    Use it as a context manager around a request:
+
+    .. code-block:: python
+
+       limiter = NodeLimiter(rate=20, max_in_flight=4)
+       with limiter:
+           response = send_request()
+
+    Args:
+        rate (float): Maximum requests per second. ``None`` for no limit.
+        burst (float): Size of the token bucket. Defaults to ``rate``.
+        max_in_flight (int): Maximum concurrent requests. ``None`` for no
+            limit.
+        min_rate (float): The rate is never lowered below this.
+        backoff (float): First pause after throttling, in seconds.
+        backoff_max (float): Upper bound of the pause, in seconds.
+
+    """
+
+    def __init__(self,
+                 rate=None,
+                 burst=None,
+                 max_in_flight=None,
+                 min_rate=1,
+                 backoff=1,
+                 backoff_max=60):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate) if rate else min_rate
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+
+        self.bucket = None
+        if rate:
+            self.bucket = TokenBucket(rate, burst or max(rate, 1))
+        self.semaphore = None
+        if max_in_flight:
+            self.semaphore = threading.BoundedSemaphore(max_in_flight)
+
+        self.throttles = 0
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+    @property
+    def rate(self):
+        return self.bucket.rate if self.bucket else None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def acquire(self):
+        pause = self.paused_until - time.time()
+        if pause > 0:
+            time.sleep(pause)
+        if self.semaphore:
+            self.semaphore.acquire()
+        if self.bucket:
+            self.bucket.acquire()
+
+    def try_acquire(self):
+        """ Non-blocking ``acquire()``, for callers which must not block,
+        ie. coroutines. Returns ``None`` once a slot and a token were
+        taken, otherwise the seconds to wait before trying again. """
+        pause = self.paused_until - time.time()
+        if pause > 0:
+            return pause
+        if self.semaphore and not self.semaphore.acquire(False):
+            return 0.01
+        if self.bucket and not self.bucket.consume():
+            self.release()
+            return 1.0 / self.bucket.rate
+        return None
+
+    def release(self):
+        if self.semaphore:
+            self.semaphore.release()
+
+    def record_throttled(self):
+        """ The node told us to slow down. """
+        with self.lock:
+            self.throttles += 1
+            pause = min(self.backoff * 2 ** (self.throttles - 1),
+                        self.backoff_max)
+            self.paused_until = time.time() + pause
+            if self.bucket:
+                self.bucket.set_rate(max(self.min_rate, self.bucket.rate / 2))
+            logger.debug('Throttled; pausing %ss at rate %s', pause,
+                         self.rate)
+
+    def record_success(self):
+        with self.lock:
+            self.throttles = 0
+            if self.bucket and self.bucket.rate < self.max_rate:
+                step = self.max_rate / 20.
+                self.bucket.set_rate(
+                    min(self.max_rate, self.bucket.rate + step))
@@ -0,0 +1,133 @@
+# coding=utf-8
+import random
+import threading
+import time
+
+#: retry the request on the same node
+RETRY = 'retry'
+#: retry the request on the next healthy node
+FAILOVER = 'failover'
+#: give up and raise the exception
+RAISE = 'raise'
+
+
+class TokenBucket(object):
+    """ A thread-safe token bucket.
+
+    Args:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum number of tokens (burst size).
+
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.time()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def set_rate(self, rate):
+        with self.lock:
+            self._refill(time.time())
+            self.rate = float(rate)
+
+    def acquire(self, tokens=1):
+        """ Block until ``tokens`` are available, then take them. """
+        while True:
+            with self.lock:
+                self._refill(time.time())
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def consume(self, tokens=1):
+        """ Take ``tokens`` out of the bucket. Returns False, without
+        taking anything, if there are not enough of them. """
+        with self.lock:
+            self._refill(time.time())
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+
+class RetryPolicy(object):
+    """ Decides if, when and where a failed request is retried.
+
+    Delays grow exponentially from ``backoff_base`` up to ``backoff_max``
+    seconds, with full jitter so that many workers do not retry in
+    lockstep. Every retry is paid for with a token from the retry
+    budget; once the budget is used up, errors are raised right away
+    instead of piling more load onto nodes which are already degraded.
+
+    Args:
+        max_retries (int): Maximum number of retries of a single request.
+        backoff_base (float): Delay before the first retry, in seconds.
+        backoff_max (float): Upper bound of the delay, in seconds.
+        jitter (bool): Randomize delays between 0 and the backoff.
+        budget_rate (float): Retry tokens added to the budget per second.
+        budget_burst (float): Size of the retry budget. Set to ``None`` to
+            disable the budget.
+        rules (list): ``(exception_types, action)`` tuples, where action is
+            one of ``RETRY``, ``FAILOVER`` or ``RAISE``. The first matching
+            rule wins; exceptions without a matching rule fail over.
+
+    .. code-block:: python
+
+       from steem.steemd import Steemd
+       from steembase.retry import RetryPolicy, RETRY
+       from urllib3.exceptions import ReadTimeoutError
+
+       s = Steemd(retry_policy=RetryPolicy(
+           max_retries=5, rules=[(ReadTimeoutError, RETRY)]))
+
+    """
+
+    def __init__(self,
+                 max_retries=10,
+                 backoff_base=0.5,
+                 backoff_max=30,
+                 jitter=True,
+                 budget_rate=1,
+                 budget_burst=20,
+                 rules=None):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.rules = list(rules or [])
+        self.budget = None
+        if budget_burst is not None:
+            self.budget = TokenBucket(budget_rate, budget_burst)
+
+    def classify(self, error):
+        """ Return the action to take for ``error``. """
+        for exception_types, action in self.rules:
+            if isinstance(error, exception_types):
+                return action
+        return FAILOVER
+
+    def backoff(self, attempt):
+        """ Seconds to wait before retry number ``attempt`` (1-based). """
+        delay = min(self.backoff_max,
+                    self.backoff_base * 2 ** max(attempt - 1, 0))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def allow(self, attempt, error):
+        """ Whether retry number ``attempt`` may be made after ``error``.
+        Takes a token from the retry budget if so. """
+        if attempt > self.max_retries:
+            return False
+        if self.classify(error) == RAISE:
+            return False
+        return self.budget is None or self.budget.consume()
@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+import pytest
+
+
+class FakeResponse(object):
+    REDIRECT_STATUSES = [301, 302, 303, 307, 308]
+
+    def __init__(self, payload, status=200, transport=None, delay=0):
+        self.status = status
+        self.data = json.dumps(payload).encode('utf-8')
+        self.transport = transport
+        self.delay = delay
+
+    # aiohttp style
+
+    async def __aenter__(self):
+        self.transport.enter()
+        await asyncio.sleep(self.delay)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.transport.in_flight -= 1
+
+    async def read(self):
+        return self.data
+
+
+class FakeTransport(object):
+    """ A fake node, which answers JSON-RPC requests (and batches of
+    them) with ``handler(request)``. Its return value is sent as the
+    result, unless it is a complete response (ie. an error) with a
+    ``jsonrpc`` key.
+
+    It stands in for the ``urllib3`` pool manager of ``HttpClient`` and
+    for the ``aiohttp`` session of ``AsyncHttpClient``. ``status(url)``
+    may return another HTTP status than 200 for a node.
+    """
+
+    def __init__(self, handler, status=None, delay=0):
+        self.handler = handler
+        self.status = status or (lambda url: 200)
+        self.delay = delay
+        self.closed = False
+        #: decoded request bodies
+        self.bodies = []
+        #: ``(url, body)`` of every request
+        self.requests = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def enter(self):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def respond(self, url, body):
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        request = json.loads(body)
+        self.bodies.append(request)
+        self.requests.append((url, request))
+        status = self.status(url)
+        if status != 200:
+            return {}, status
+        if isinstance(request, list):
+            return [self.answer(r) for r in request], status
+        return self.answer(request), status
+
+    def answer(self, request):
+        response = self.handler(request)
+        if isinstance(response, dict) and 'jsonrpc' in response:
+            return dict(response, id=request['id'])
+        return {'jsonrpc': '2.0', 'id': request['id'], 'result': response}
+
+    def urlopen(self, method, url, body=None, **kwargs):
+        payload, status = self.respond(url, body)
+        return FakeResponse(payload, status)
+
+    def post(self, url, data=None, **kwargs):
+        payload, status = self.respond(url, data)
+        return FakeResponse(payload, status, transport=self,
+                            delay=self.delay)
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_node():
+    """ Install a ``FakeTransport`` on a client:
+    ``fake_node(client, handler, **kwargs)``. """
+    def install(client, handler, **kwargs):
+        transport = FakeTransport(handler, **kwargs)
+        client.http = transport
+        client.session = transport
+        return transport
+    return install
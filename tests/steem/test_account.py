@@ -1,4 +1,7 @@
 from steem.account import Account
+from steem.history_store import AccountHistoryStore
+from steem.steemd import Steemd
+from steembase.exceptions import RPCError
 
 
 def test_history():
@@ -20,3 +23,164 @@ def test_history():
     assert len(h1) == len(h2)
     assert set(h1) == set(h2) == set(range(a.virtual_op_count() + 1))
     assert h1 == h2[::-1] == list(range(a.virtual_op_count() + 1))
+
+
+class FakeSteemd(object):
+    """ An account with ``count`` history items, paged like steemd:
+    ``limit + 1`` items ending at ``index_from``. """
+
+    max_workers = 4
+
+    def __init__(self, count, history_filter=False):
+        self.count = count
+        self.history_filter = history_filter
+        self.requests = []
+
+    def get_account(self, name):
+        return {'name': name, 'json_metadata': '{}'}
+
+    def get_accounts(self, names):
+        self.requests.append(tuple(names))
+        return [self.get_account(name) for name in names
+                if not name.startswith('missing')]
+
+    def item(self, i):
+        op_type = 'transfer' if i % 10 == 3 else 'vote'
+        return [i, {'block': i, 'trx_id': 'x', 'op': [op_type, {'n': i}],
+                    'timestamp': '2018-01-01T00:00:00'}]
+
+    def get_account_history(self, account, index_from, limit,
+                            filter_by=None):
+        if index_from == -1:
+            index_from = self.count - 1
+        self.requests.append((index_from, limit))
+        assert index_from >= limit
+        if filter_by and self.history_filter:
+            # up to ``limit`` matches, scanning back as far as needed
+            matches = [self.item(i) for i in range(index_from, -1, -1)
+                       if self.item(i)[1]['op'][0] in filter_by]
+            return matches[:limit][::-1]
+        first = max(index_from - limit, 0)
+        return [self.item(i)
+                for i in range(first, min(index_from, self.count - 1) + 1)
+                if not filter_by or self.item(i)[1]['op'][0] in filter_by]
+
+
+def test_history_pages():
+    a = Account('alice', steemd_instance=FakeSteemd(2503))
+    assert [x['index'] for x in a.history(batch_size=100)] == \
+        list(range(2503))
+    assert [x['index'] for x in a.history(start=1000, batch_size=100)] == \
+        list(range(1000, 2503))
+    assert [x['index'] for x in a.history_reverse(batch_size=100)] == \
+        list(range(2502, -1, -1))
+
+
+def test_history_store_syncs_tail(tmpdir):
+    steemd = FakeSteemd(250)
+    store = AccountHistoryStore(str(tmpdir.join('history.sqlite')))
+    a = Account('alice', steemd_instance=steemd, history_store=store)
+
+    assert [x['index'] for x in a.history(batch_size=100)] == \
+        list(range(250))
+    assert store.last_index('alice') == 249
+
+    steemd.count = 260
+    del steemd.requests[:]
+    assert [x['index'] for x in a.history_reverse(batch_size=100)] == \
+        list(range(259, -1, -1))
+    # only the new items were fetched
+    assert steemd.requests[1:] == [(259, 9)]
+
+    votes = list(a.history(filter_by=['vote'], raw_output=True))
+    assert votes[0] == steemd.get_account_history('alice', 0, 0)[0]
+
+
+def test_history_filtered_by_node():
+    transfers = [i for i in range(2503) if i % 10 == 3]
+    for history_filter in (True, False):
+        steemd = FakeSteemd(2503, history_filter=history_filter)
+        a = Account('alice', steemd_instance=steemd)
+        assert [x['index'] for x in
+                a.history(filter_by='transfer', batch_size=100)] == transfers
+        assert [x['index'] for x in
+                a.history_reverse(filter_by=['transfer'], batch_size=100)] \
+            == transfers[::-1]
+        assert [x['index'] for x in
+                a.history(filter_by='transfer', start=1000, batch_size=100)] \
+            == [i for i in transfers if i >= 1000]
+
+    # pages of matching items only
+    steemd = FakeSteemd(2503, history_filter=True)
+    a = Account('alice', steemd_instance=steemd)
+    del steemd.requests[:]
+    list(a.history_reverse(filter_by='transfer', batch_size=100))
+    assert steemd.requests[1:] == [(2502, 100), (1502, 100), (502, 100)]
+
+    # the last page starts below batch_size
+    steemd = FakeSteemd(1500, history_filter=True)
+    a = Account('alice', steemd_instance=steemd)
+    del steemd.requests[:]
+    assert len(list(a.history_reverse(filter_by='transfer',
+                                      batch_size=50))) == 150
+    assert steemd.requests[1:] == [(1499, 50), (1002, 50), (502, 50),
+                                   (2, 2)]
+
+
+def test_load_many():
+    steemd = FakeSteemd(0)
+    names = ['user%d' % i for i in range(250)] + ['missing', 'user0']
+    accounts = Account.load_many(names, steemd_instance=steemd,
+                                 batch_size=100, id_scheme='position')
+    assert sorted(accounts) == sorted(names[:250])
+    assert accounts['user7'].name == 'user7'
+    assert accounts['user7']['json_metadata'] == {}
+    assert accounts['user7'].id_scheme == 'position'
+    assert sorted(len(x) for x in steemd.requests) == [51, 100, 100]
+
+
+def test_steemd_history_filter_checks_operation_ids():
+    history = [[0, {'op': ['vote', {}]}],
+               [1, {'op': ['curation_reward', {}]}],
+               [2, {'op': ['claim_account', {}]}]]
+    requests = []
+
+    def call(name, *args, **kwargs):
+        requests.append(args)
+        if len(args) > 3:
+            # a node which numbers operations differently
+            return history[2:]
+        return history
+
+    s = Steemd(nodes=['http://localhost:1'])
+    s.call = call
+
+    # virtual operations are never filtered by the node
+    assert s.get_account_history('a', 2, 2, filter_by='curation_reward') \
+        == history[1:2]
+    assert requests == [('a', 2, 2)]
+    assert s.history_filter is None
+
+    # unexpected operations disable node side filtering
+    assert s.get_account_history('a', 2, 2, filter_by='vote') == history[:1]
+    assert requests[1:] == [('a', 2, 2, 1, 0), ('a', 2, 2)]
+    assert s.history_filter is False
+
+
+def test_steemd_history_filter_falls_back_per_request():
+    history = [[0, {'op': ['vote', {}]}], [1, {'op': ['transfer', {}]}]]
+    nodes = []
+
+    def call(name, *args, **kwargs):
+        # the first node filters, the second one does not
+        if len(args) > 3 and nodes.pop(0) == 'legacy':
+            raise RPCError('unknown operation filter')
+        return history[:1] if len(args) > 3 else history
+
+    s = Steemd(nodes=['http://localhost:1'])
+    s.call = call
+    nodes.extend(['appbase', 'legacy'])
+    assert s.get_account_history('a', 1, 1, filter_by='vote') == history[:1]
+    assert s.history_filter is True
+    assert s.get_account_history('a', 1, 1, filter_by='vote') == history[:1]
+    assert s.history_filter is False
@@ -0,0 +1,134 @@
+from steem.block_archive import ArchiveReader, BlockArchive
+from steem.block import attach_virtual_ops
+from steem.blockchain import Blockchain
+from steem.steemd import Steemd
+
+
+class FakeChain(object):
+    """ A ``fake_node`` handler answering get_block, get_ops_in_block and
+    get_dynamic_global_properties for a chain with 100 irreversible
+    blocks. """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, request):
+        method, params = request['params'][1:]
+        self.calls.append((method, params[0] if params else None))
+        if method == 'get_dynamic_global_properties':
+            return {'head_block_number': 120,
+                    'last_irreversible_block_num': 100}
+        if method == 'get_block':
+            return {'block_id': '%08x' % params[0] + '0' * 32}
+        ops = [{'block': params[0], 'virtual_op': 0, 'op': ['vote', {}]},
+               {'block': params[0], 'virtual_op': 1,
+                'op': ['author_reward', {}]}]
+        return ops[1:] if params[1] else ops
+
+
+def test_archive_roundtrip(tmpdir):
+    path = str(tmpdir)
+    archive = BlockArchive(path, segment_size=10)
+    assert archive.get('blocks', 5) is None
+    for n in range(25):
+        archive.put('blocks', n, {'n': n})
+    assert archive.get('blocks', 17) == {'n': 17}
+    archive.close()
+    assert sorted(tmpdir.listdir())[0].basename == 'blocks-0000000000.dat'
+
+    # an index entry pointing past the end of the data is ignored
+    with open(str(tmpdir.join('blocks-0000000020.dat')), 'r+b') as f:
+        f.truncate(f.seek(0, 2) - 1)
+    archive = BlockArchive(path, segment_size=10)
+    assert archive.get('blocks', 17) == {'n': 17}
+    assert archive.get('blocks', 24) is None
+
+
+def test_archive_closes_least_recently_used_segments(tmpdir):
+    archive = BlockArchive(str(tmpdir), segment_size=10, max_segments=2)
+    for n in range(50):
+        archive.put('blocks', n, {'n': n})
+        archive.put('ops', n, [])
+    assert len(archive.segments) == 2
+    # evicted segments are reopened, and keep their records
+    assert archive.get('blocks', 5) == {'n': 5}
+    archive.put('blocks', 5, {'n': -5})
+    assert archive.get('blocks', 5) == {'n': 5}
+    assert len(archive.segments) == 2
+    archive.close()
+
+
+def test_steemd_reads_through_archive(tmpdir, fake_node):
+    chain = FakeChain()
+    s = Steemd(nodes=['http://node.test'], block_archive=str(tmpdir))
+    fake_node(s, chain)
+
+    assert s.get_block(50)['block_id'].startswith('00000032')
+    assert s.get_block(50)['block_id'].startswith('00000032')
+    assert chain.calls.count(('get_block', 50)) == 1
+
+    # reversible blocks are not archived
+    s.get_block(110)
+    s.get_block(110)
+    assert chain.calls.count(('get_block', 110)) == 2
+
+    blocks = s.get_blocks(range(45, 55))
+    assert [b['block_num'] for b in blocks] == list(range(45, 55))
+    assert s.get_blocks([50])[0] == blocks[5]
+
+    assert len(s.get_ops_in_block(60, False)) == 2
+    assert s.get_ops_in_block(60, True)[0]['op'][0] == 'author_reward'
+    assert chain.calls.count(('get_ops_in_block', 60)) == 1
+
+
+def test_archive_reader(tmpdir):
+    path = str(tmpdir)
+    archive = BlockArchive(path, segment_size=10, compress_level=0)
+    for n in range(1, 31):
+        archive.put('blocks', n, {'block_id': '%08x' % n, 'n': n})
+        archive.put('ops', n, [{'block': n, 'virtual_op': 0,
+                                'trx_id': 'x', 'timestamp':
+                                '2018-01-01T00:00:00',
+                                'op': ['vote', {'voter': 'a'}]}])
+    archive.close()
+
+    reader = ArchiveReader(path, max_segments=2)
+    raw = reader.get_raw('blocks', 12)
+    assert isinstance(raw, memoryview)
+    assert bytes(raw).startswith(b'{')
+    assert reader.get_block(12)['n'] == 12
+    assert reader.get_block(99) is None
+    assert reader.head_block() == 30
+    blocks = list(reader.iter_blocks(range(5, 25)))
+    assert [b['block_num'] for b in blocks] == list(range(5, 25))
+    assert len(reader.segments) == 2
+
+    b = Blockchain(source=path)
+    assert [op['block_num'] for op in b.stream(start_block=3)] == \
+        list(range(3, 31))
+
+
+def test_attach_virtual_ops():
+    block = {'transaction_ids': ['a' * 40, 'b' * 40],
+             'transactions': [{'operations': []}, {'operations': []}]}
+    ops = [{'trx_id': 'b' * 40, 'trx_in_block': 1,
+            'op': ['fill_order', {}]},
+           {'trx_id': '0' * 40, 'trx_in_block': 4294967295,
+            'op': ['producer_reward', {}]}]
+    attach_virtual_ops(block, ops)
+    assert block['transactions'][0]['virtual_operations'] == []
+    assert block['transactions'][1]['virtual_operations'] == ops[:1]
+    assert block['virtual_operations'] == ops[1:]
+
+
+def test_iter_blocks_with_virtual_ops(fake_node):
+    chain = FakeChain()
+    s = Steemd(nodes=['http://node.test'])
+    transport = fake_node(s, chain)
+    blocks = list(s.iter_blocks(range(1, 101), with_virtual_ops=True))
+    assert [b['block_num'] for b in blocks] == list(range(1, 101))
+    assert [op['op'][0] for op in blocks[0]['virtual_operations']] == \
+        ['author_reward']
+    assert len([c for c in chain.calls if c[0] == 'get_block']) == 100
+    # batches stay within the 50 calls accepted by jussi
+    assert max(len(body) for body in transport.bodies) == 50
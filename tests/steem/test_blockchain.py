@@ -0,0 +1,229 @@
+from itertools import islice
+
+import pytest
+from steem import blockchain
+from steem.blockchain import APPLY, ROLLBACK, Blockchain, BlockTimer
+from steem.checkpoint import MemoryCheckpointStore, SqliteCheckpointStore
+from steembase.exceptions import ForkTooDeepException
+
+
+class FakeSteemd(object):
+    """ A chain of ``head`` blocks with one transfer per block, whose head
+    grows by ``growth`` blocks on every head block query. """
+
+    def __init__(self, head=100, growth=0):
+        self.head = head
+        self.growth = growth
+        self.fetched = []
+        #: first block of the current branch
+        self.fork_from = None
+
+    def get_config(self):
+        return {'STEEM_BLOCK_INTERVAL': 0}
+
+    def get_dynamic_global_properties(self):
+        head = self.head
+        self.head += self.growth
+        return {'head_block_number': head,
+                'last_irreversible_block_num': head}
+
+    def ops(self, block_num):
+        return [{'block': block_num, 'trx_in_block': 0, 'op_in_trx': 0,
+                 'virtual_op': 0, 'trx_id': 'trx%d' % block_num,
+                 'timestamp': '2018-01-01T00:00:00',
+                 'op': ['transfer', {'from': 'a', 'to': 'b'}]},
+                {'block': block_num, 'trx_in_block': 0, 'op_in_trx': 0,
+                 'virtual_op': 1, 'trx_id': 'trx%d' % block_num,
+                 'timestamp': '2018-01-01T00:00:00',
+                 'op': ['author_reward', {'author': 'a'}]}]
+
+    def iter_ops_in_blocks(self, block_nums, virtual_only=False, **kwargs):
+        for block_num in block_nums:
+            self.fetched.append(block_num)
+            ops = self.ops(block_num)
+            yield [x for x in ops if x['virtual_op']] if virtual_only else ops
+
+    def block_id(self, block_num):
+        branch = 'b' if self.fork_from and block_num >= self.fork_from \
+            else 'a'
+        return '%08x' % block_num + branch * 32
+
+    def get_block(self, block_num):
+        if block_num > self.head:
+            return None
+        return {'block_id': self.block_id(block_num),
+                'previous': self.block_id(block_num - 1)}
+
+    def iter_blocks(self, block_nums, **kwargs):
+        for block_num in block_nums:
+            self.fetched.append(block_num)
+            block = self.get_block(block_num)
+            block['block_num'] = block_num
+            yield block
+
+
+def test_stream_from_range():
+    b = Blockchain(steemd_instance=FakeSteemd())
+    ops = list(b.stream_from(start_block=10, end_block=20))
+    assert [op['block'] for op in ops[::2]] == list(range(10, 21))
+
+
+def test_stream_from_follows_head():
+    steemd = FakeSteemd(head=5, growth=3)
+    b = Blockchain(steemd_instance=steemd)
+    blocks = list(b.stream_from(start_block=1, end_block=30,
+                                full_blocks=True))
+    assert [x['block_num'] for x in blocks] == list(range(1, 31))
+    assert steemd.fetched == list(range(1, 31))
+
+
+def test_stream_resumes_from_checkpoint():
+    store = MemoryCheckpointStore()
+    b = Blockchain(steemd_instance=FakeSteemd())
+
+    stream = b.stream(start_block=1, end_block=50, checkpoint='test',
+                      checkpoint_store=store, checkpoint_interval=10)
+    seen = [next(stream)['block_num'] for _ in range(25)]
+    assert store.load('test') == (10, 1, False)
+    stream.close()
+    # the last yielded op was never acknowledged
+    assert store.load('test') == (12, 1, False)
+
+    stream = b.stream(start_block=1, end_block=50, checkpoint='test',
+                      checkpoint_store=store)
+    rest = [op['_id'] for op in stream]
+    assert len(seen) + len(rest) == 101
+    assert store.load('test') == (50, 1, False)
+
+
+def test_sqlite_checkpoint_store(tmpdir):
+    path = str(tmpdir.join('checkpoints.sqlite'))
+    store = SqliteCheckpointStore(path)
+    assert store.load('a') is None
+    store.save('a', (10, 2, True))
+    store.close()
+    assert SqliteCheckpointStore(path).load('a') == (10, 2, True)
+
+
+def test_replay_shard(monkeypatch):
+    steemd = FakeSteemd()
+    steemd.nodes = ['http://node.test']
+    monkeypatch.setattr(blockchain, '_worker_steemd', steemd)
+    monkeypatch.setattr(blockchain, '_worker_source', steemd.nodes)
+    task = (steemd.nodes, 'irreversible', 'sha1', (10, 20), ['transfer'],
+            False)
+    ops = blockchain._replay_shard(task)
+    assert [op['block_num'] for op in ops] == list(range(10, 20))
+    assert ops[0]['type'] == 'transfer'
+
+
+def test_stream_pushes_virtual_filter_down():
+    b = Blockchain(steemd_instance=FakeSteemd())
+    ops = list(b.stream(['author_reward'], start_block=1, end_block=10,
+                        raw_output=True))
+    assert len(ops) == 10
+    assert all(op['virtual_op'] for op in ops)
+
+    ops = list(b.stream(['transfer'], start_block=1, end_block=10))
+    assert [op['type'] for op in ops] == ['transfer'] * 10
+
+
+def test_stream_rejects_checkpoints_of_other_filters():
+    store = MemoryCheckpointStore()
+    b = Blockchain(steemd_instance=FakeSteemd())
+    ops = list(b.stream(['author_reward'], start_block=1, end_block=10,
+                        checkpoint='rewards', checkpoint_store=store))
+    assert len(ops) == 10
+    # the index counts virtual ops only
+    assert store.load('rewards') == (10, 0, True)
+
+    stream = b.stream(['author_reward', 'transfer'], start_block=1,
+                      end_block=10, checkpoint='rewards',
+                      checkpoint_store=store)
+    with pytest.raises(ValueError):
+        next(stream)
+    assert store.load('rewards') == (10, 0, True)
+
+
+def test_position_ids():
+    b = Blockchain(steemd_instance=FakeSteemd(), id_scheme='position')
+    ops = list(b.stream(start_block=1, end_block=2))
+    assert [op['_id'] for op in ops] == [
+        '1/0/0/0/transfer', '1/0/0/1/author_reward',
+        '2/0/0/0/transfer', '2/0/0/1/author_reward']
+    event = FakeSteemd().ops(7)[0]
+    assert Blockchain.position_id(event, account='a') == 'a/7/0/0/0/transfer'
+
+
+def test_stream_head_rolls_back_forks():
+    steemd = FakeSteemd(head=10)
+    b = Blockchain(steemd_instance=steemd, mode='head')
+    stream = b.stream_head(start_block=1, end_block=20)
+    events = [next(stream) for _ in range(10)]
+    assert [e for e, _ in events] == [APPLY] * 10
+
+    # blocks 8 to 10 are replaced by another branch
+    steemd.fork_from = 8
+    steemd.head = 20
+    events = [(e, block['block_num'], block['block_id'][-1])
+              for e, block in stream]
+    assert events[:3] == [(ROLLBACK, 10, 'a'), (ROLLBACK, 9, 'a'),
+                          (ROLLBACK, 8, 'a')]
+    assert events[3:] == [(APPLY, n, 'b') for n in range(8, 21)]
+
+
+def test_stream_head_raises_on_deep_forks():
+    steemd = FakeSteemd(head=10)
+    b = Blockchain(steemd_instance=steemd, mode='head')
+    stream = b.stream_head(start_block=1, end_block=20, max_fork_depth=2)
+    list(islice(stream, 10))
+    steemd.fork_from = 5
+    steemd.head = 20
+    with pytest.raises(ForkTooDeepException):
+        list(stream)
+
+
+def test_block_timer(monkeypatch):
+    now = [1500000000.5]
+    monkeypatch.setattr(blockchain.time, 'time', lambda: now[0])
+    timer = BlockTimer(block_interval=3, margin=0.2)
+    assert timer.delay() == 3
+
+    # block 10 was produced at 1500000000, and seen half a second later
+    timer.update({'head_block_number': 10, 'time': '2017-07-14T02:40:00'})
+    assert round(timer.delay(), 3) == 3.2
+
+    # block 11 is overdue; back off
+    now[0] += 3.5
+    timer.update({'head_block_number': 10, 'time': '2017-07-14T02:40:00'})
+    assert round(timer.delay(), 3) == 0.4
+    timer.update({'head_block_number': 10, 'time': '2017-07-14T02:40:00'})
+    assert round(timer.delay(), 3) == 0.8
+
+    # block 11 arrived late; the clock offset is not affected
+    timer.update({'head_block_number': 11, 'time': '2017-07-14T02:40:03'})
+    assert round(timer.delay(), 3) == 2.7
+
+
+def test_stream_head_waits_for_announced_blocks(monkeypatch):
+    steemd = FakeSteemd(head=10)
+    b = Blockchain(steemd_instance=steemd, mode='head')
+    stream = b.stream_head(start_block=1, end_block=11)
+    list(islice(stream, 10))
+
+    # block 11 is announced, but not served yet
+    get_block = steemd.get_block
+    steemd.get_dynamic_global_properties = lambda: {
+        'head_block_number': 11, 'last_irreversible_block_num': 10}
+    steemd.get_block = lambda n: None if n == 11 else get_block(n)
+    sleeps = []
+
+    def sleep(timer):
+        sleeps.append(1)
+        if len(sleeps) == 3:
+            steemd.head = 11
+            del steemd.get_block
+
+    monkeypatch.setattr(BlockTimer, 'sleep', sleep)
+    assert [block['block_num'] for _, block in stream] == [11]
+    assert len(sleeps) == 3
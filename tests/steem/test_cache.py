@@ -0,0 +1,75 @@
+import time
+
+from steem.cache import TTLCache
+from steem.converter import Converter
+from steem.steemd import Steemd
+
+
+def test_ttl_cache():
+    cache = TTLCache(ttl=0.05, block_keys=['a'])
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return len(fetches)
+
+    assert cache.get('a', fetch) == 1
+    assert cache.get('a', fetch) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    time.sleep(0.06)
+    assert cache.get('a', fetch) == 2
+
+    cache.invalidate('a')
+    assert cache.get('a', fetch) == 3
+    assert cache.get('b', fetch) == 4
+    cache.new_block(10)
+    assert cache.get('a', fetch) == 5
+    assert cache.get('b', fetch) == 4
+    cache.new_block(10)
+    assert cache.get('a', fetch) == 5
+    assert (cache.hits, cache.misses) == (3, 5)
+
+
+def test_ttl_cache_disabled():
+    cache = TTLCache(ttl=0)
+    assert cache.get('a', lambda: 1) == 1
+    assert cache.get('a', lambda: 2) == 2
+
+
+class FakeNode(object):
+    def __init__(self):
+        self.calls = []
+        self.head_block = 100
+
+    def __call__(self, name, *args, **kwargs):
+        self.calls.append(name)
+        if name == 'get_dynamic_global_properties':
+            return {'head_block_number': self.head_block,
+                    'last_irreversible_block_num': self.head_block - 20,
+                    'total_vesting_fund_steem': '1000.000 STEEM',
+                    'total_vesting_shares': '2000000.000000 VESTS'}
+        if name == 'get_feed_history':
+            return {'current_median_history': {'base': '2.000 SBD',
+                                               'quote': '1.000 STEEM'}}
+
+
+def test_steemd_cache():
+    s = Steemd(nodes=['http://localhost:1'], cache_ttl=60)
+    s.call = node = FakeNode()
+    converter = Converter(steemd_instance=s)
+
+    assert converter.sbd_median_price() == 2
+    assert converter.steem_to_sbd(3) == 6
+    assert converter.steem_per_mvests() == 500
+    assert converter.vests_to_sp(2e6) == 1000
+    assert node.calls == ['get_feed_history',
+                          'get_dynamic_global_properties']
+
+    # a newer head block only replaces the properties; the feed is kept
+    # until it expires
+    node.head_block = 101
+    s.cache.new_block(101)
+    converter.steem_per_mvests()
+    converter.sbd_median_price()
+    assert node.calls[2:] == ['get_dynamic_global_properties']
+    assert s.cache.block_num == 101
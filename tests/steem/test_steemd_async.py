@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+from steem.steemd_async import AsyncSteemd
+from steembase.exceptions import RPCError
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def fake_chain(request):
+    method, params = request['params'][1:]
+    if method == 'get_dynamic_global_properties':
+        return {'head_block_number': 100}
+    if method == 'get_account_history':
+        return [[0, {'op': ['vote', {}]}], [1, {'op': ['transfer', {}]}]]
+    return params
+
+
+def test_rpc_methods_take_steemd_arguments(fake_node):
+    s = AsyncSteemd(nodes=['http://node.test'])
+    fake_node(s, fake_chain)
+
+    assert run(s.get_reward_fund()) == ['post']
+    assert run(s.get_ops_in_block(5, virtual_only=True)) == [5, True]
+    assert run(s.get_block(block_num=3)) == [3]
+    with pytest.raises(TypeError):
+        run(s.get_ops_in_block(5))
+
+    history = run(s.get_account_history('a', 1, 1, filter_by='transfer'))
+    assert history == [[1, {'op': ['transfer', {}]}]]
+
+
+def test_cached_chain_state(fake_node):
+    s = AsyncSteemd(nodes=['http://node.test'])
+    transport = fake_node(s, fake_chain)
+
+    async def main():
+        for _ in range(3):
+            await s.get_dynamic_global_properties(cached=True)
+            await s.get_reward_fund(cached=True)
+
+    run(main())
+    assert len(transport.bodies) == 2
+    assert (s.cache.hits, s.cache.misses) == (4, 2)
+
+
+def test_get_blocks_gives_up_on_missing_blocks(fake_node):
+    def chain(request):
+        block_num = request['params'][2][0]
+        if block_num > 10:
+            # not produced yet
+            return None
+        return {'block_id': '%08x' % block_num + '0' * 32}
+
+    s = AsyncSteemd(nodes=['http://node.test'])
+    transport = fake_node(s, chain)
+    blocks = run(s.get_blocks(range(5, 11)))
+    assert [b['block_num'] for b in blocks] == list(range(5, 11))
+
+    with pytest.raises(RPCError):
+        run(s.get_blocks(range(9, 12)))
+    assert [len(b) for b in transport.bodies[1:]] == [3, 1, 1]
@@ -0,0 +1,195 @@
+import time
+
+import pytest
+from steembase.http_client import HttpClient, imap_ordered, imap_unordered
+from steembase.retry import RetryPolicy
+
+
+@pytest.fixture
+def fake_client(fake_node):
+    """ ``fake_client(handler, nodes=..., **kwargs)`` makes an
+    ``HttpClient`` talking to a ``fake_node``. """
+    def make(handler, nodes='http://node1.test,http://node2.test',
+             **kwargs):
+        client = HttpClient(nodes)
+        fake_node(client, handler, **kwargs)
+        client.next_node()
+        return client
+    return make
+
+
+def echo_block(request):
+    return request['params'][2][0]
+
+
+def test_call(fake_client):
+    client = fake_client(echo_block)
+    assert client.call('get_block', 7, api='database_api') == 7
+
+
+def test_call_batch_orders_results(fake_client):
+    client = fake_client(echo_block)
+    calls = [('get_block', [n], {'api': 'database_api'}) for n in range(120)]
+    assert client.call_batch(calls, batch_size=50) == list(range(120))
+    assert [len(b) for b in client.http.bodies] == [50, 50, 20]
+
+
+def test_call_batch_retries_failed_entries_only(fake_client):
+    failed = set()
+
+    def flaky(request):
+        if request['id'] % 3 == 0 and request['id'] not in failed:
+            failed.add(request['id'])
+            return {'jsonrpc': '2.0', 'id': request['id'],
+                    'error': {'code': -32003,
+                              'message': 'Unable to acquire database lock'}}
+        return echo_block(request)
+
+    client = fake_client(flaky)
+    client._retry_wait = lambda tries, e, url: (tries + 1, url)
+    calls = [('get_block', [n], {'api': 'database_api'}) for n in range(10)]
+    assert client.call_batch(calls) == list(range(10))
+    assert [len(b) for b in client.http.bodies] == [10, 4]
+
+
+def test_call_batch_downgrades_legacy_node(fake_client):
+    def legacy(request):
+        if request['method'] == 'call':
+            return {'jsonrpc': '2.0', 'id': request['id'],
+                    'error': {'code': 1,
+                              'message': 'no method with name '
+                                         'condenser_api\nmore'}}
+        return request['params'][0]
+
+    client = fake_client(legacy, nodes='http://legacy.test')
+    try:
+        assert client.call_batch([('get_block', [n]) for n in range(3)]) \
+            == [0, 1, 2]
+        assert [len(b) for b in client.http.bodies] == [3, 3]
+        assert client.call('get_block', 5) == 5
+    finally:
+        HttpClient.non_appbase_nodes.discard('http://legacy.test')
+
+
+def test_failures_are_recorded_against_the_node_used(fake_client):
+    client = fake_client(echo_block)
+    client.retry_policy = RetryPolicy(backoff_base=0)
+    bad_url = client.select_node()
+    good_url = client.scheduler.best(exclude=(bad_url,))
+    current_url = client.url
+    client.http.status = lambda url: 502 if url == bad_url else 200
+    assert client.call('get_block', 4, api='database_api') == 4
+    assert client.scheduler.health[bad_url].error_rate > 0
+    assert client.scheduler.health[good_url].error_rate == 0
+    # calls do not move the shared current node
+    assert client.url == current_url
+
+
+def test_probe_counts_error_replies_as_failures(fake_client):
+    def appbase(request):
+        if request['method'] != 'call':
+            return {'jsonrpc': '2.0', 'id': request['id'],
+                    'error': {'code': -32601, 'message': 'Method not found'}}
+        return {'head_block_number': 5}
+
+    client = fake_client(appbase, nodes='http://node1.test')
+    url = client.url
+    client._probe(url)
+    assert client.http.bodies[-1]['params'][:2] == \
+        ['condenser_api', 'get_dynamic_global_properties']
+    assert client.scheduler.health[url].head_block == 5
+
+    # the quarantine keeps doubling while probes get errors back
+    breaker = client.scheduler.health[url].breaker
+    client.scheduler.record_failure(url)
+    client.http.handler = lambda request: appbase(dict(request, method='x'))
+    client._probe(url)
+    assert breaker.trips == 2
+
+
+def test_hedged_call_returns_fastest_node(fake_client):
+    client = fake_client(echo_block)
+    slow_url = client.select_node()
+    urlopen = client.http.urlopen
+
+    def stalled_urlopen(method, url, body=None, **kwargs):
+        if url == slow_url:
+            time.sleep(2)
+        return urlopen(method, url, body=body, **kwargs)
+
+    client.http.urlopen = stalled_urlopen
+    client.hedge = True
+    client.hedge_delay = 0.05
+
+    start = time.time()
+    assert client.call('get_block', 3, api='database_api') == 3
+    assert time.time() - start < 1
+
+
+def test_hedged_call_skips_error_while_other_node_pending(fake_client):
+    client = fake_client(echo_block)
+    client.retry_policy = RetryPolicy(backoff_base=0)
+    slow_url = client.select_node()
+    respond = client.http.respond
+
+    def racing_respond(url, body):
+        if url == slow_url:
+            time.sleep(0.3)
+            return respond(url, body)
+        return {'jsonrpc': '2.0', 'id': 0,
+                'error': {'code': -32003,
+                          'message': 'Unable to acquire database lock'}}, 200
+
+    client.http.respond = racing_respond
+    client.hedge = True
+    client.hedge_delay = 0.05
+    assert client.call('get_block', 3, api='database_api') == 3
+    assert len(client.http.requests) == 1
+    assert client.scheduler.health[slow_url].error_rate == 0
+
+
+def test_imap_ordered_keeps_order_and_window():
+    in_flight = []
+    peak = []
+
+    def slow_square(x):
+        in_flight.append(x)
+        peak.append(len(in_flight))
+        time.sleep(0.01 * (x % 3))
+        in_flight.remove(x)
+        return x * x
+
+    results = imap_ordered(slow_square, iter(range(50)), max_workers=4,
+                           window=6)
+    assert list(results) == [x * x for x in range(50)]
+    assert max(peak) <= 6
+
+
+def test_imap_ordered_refetches_failures_inline():
+    failed = set()
+
+    def flaky(x):
+        if x % 5 == 0 and x not in failed:
+            failed.add(x)
+            raise ValueError(x)
+        return x
+
+    assert list(imap_ordered(flaky, range(20), max_workers=3)) == \
+        list(range(20))
+
+
+def test_call_multi_ordered(fake_client):
+    client = fake_client(echo_block)
+    results = client.call_multi_ordered('get_block', range(30),
+                                        api='database_api', max_workers=4)
+    assert list(results) == list(range(30))
+
+
+def test_imap_unordered():
+    def sleepy(x):
+        time.sleep(0.02 if x == 0 else 0)
+        return x
+
+    results = list(imap_unordered(sleepy, range(10), max_workers=4))
+    assert sorted(results) == list(range(10))
+    assert results[0] != 0
@@ -0,0 +1,57 @@
+import asyncio
+
+from steembase.http_client_async import AsyncHttpClient
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def echo_block(request):
+    return request['params'][2][0]
+
+
+def test_call_and_call_batch(fake_node):
+    client = AsyncHttpClient('http://node1.test,http://node2.test')
+    transport = fake_node(client, echo_block)
+
+    async def main():
+        single = await client.call('get_block', 7, api='database_api')
+        batch = await client.call_batch(
+            [('get_block', [n], {'api': 'database_api'}) for n in range(60)],
+            batch_size=25)
+        return single, batch
+
+    assert run(main()) == (7, list(range(60)))
+    assert sorted(len(b) for b in transport.bodies[1:]) == [10, 25, 25]
+
+
+def test_max_in_flight(fake_node):
+    client = AsyncHttpClient('http://node1.test', max_in_flight=2)
+    transport = fake_node(client, echo_block, delay=0.01)
+
+    async def main():
+        return await asyncio.gather(*[
+            client.call('get_block', n, api='database_api')
+            for n in range(10)])
+
+    assert run(main()) == list(range(10))
+    assert transport.peak_in_flight == 2
+
+
+def test_call_multi_as_completed(fake_node):
+    client = AsyncHttpClient('http://node1.test')
+    fake_node(client, echo_block)
+
+    async def main():
+        return [x async for x in client.call_multi_as_completed(
+            'get_block', range(20), api='database_api', max_workers=4)]
+
+    assert sorted(run(main())) == list(range(20))
+    # thread based helpers are not inherited
+    assert not hasattr(client, 'call_stream')
+    assert not hasattr(client, 'call_multi_ordered')
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+from steembase.json_codec import codecs, get_codec, default_codec
+
+DOC = {'id': 1, 'result': [{'body': u'été \U0001f680',
+                            'amount': '1.000 STEEM', 'weight': 10000}]}
+
+
+@pytest.mark.parametrize('name', sorted(codecs))
+def test_roundtrip(name):
+    codec = get_codec(name)
+    data = codec.dumps(DOC)
+    assert isinstance(data, bytes)
+    assert json.loads(data.decode('utf-8')) == DOC
+    assert codec.loads(json.dumps(DOC).encode('utf-8')) == DOC
+
+
+@pytest.mark.parametrize('name', sorted(codecs))
+def test_decode_errors(name):
+    codec = get_codec(name)
+    with pytest.raises(codec.decode_errors):
+        codec.loads(b'{"truncated": ')
+
+
+def test_get_codec():
+    assert get_codec() is default_codec
+    assert get_codec(default_codec) is default_codec
+    assert get_codec('json').name == 'json'
+    with pytest.raises(ValueError):
+        get_codec('nonexistent')
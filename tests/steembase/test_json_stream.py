@@ -0,0 +1,45 @@
+import json
+
+from steembase.json_stream import ResultStreamParser
+
+RESULT = [
+    [1, {'op': ['vote', {'voter': 'a "quoted" \\ voter', 'weight': 1}]}],
+    [2, {'op': ['comment', {'body': u'[{,}] été'}]}],
+    'plain', 3, None, [],
+]
+
+
+def feed_all(document, chunk_size):
+    parser = ResultStreamParser(json.loads)
+    items = []
+    for i in range(0, len(document), chunk_size):
+        items.extend(parser.feed(document[i:i + chunk_size]))
+    return parser, items
+
+
+def test_items_are_parsed_across_chunk_boundaries():
+    document = json.dumps({'jsonrpc': '2.0', 'result': RESULT, 'id': 1},
+                          ensure_ascii=False).encode('utf-8')
+    for chunk_size in (1, 2, 3, 7, 64, len(document)):
+        parser, items = feed_all(document, chunk_size)
+        assert parser.streamed
+        assert items == RESULT
+
+
+def test_consumed_items_are_dropped_from_buffer():
+    document = json.dumps({'result': [{'x': 'y' * 100}] * 100}).encode()
+    parser = ResultStreamParser(json.loads)
+    for i in range(0, len(document), 50):
+        parser.feed(document[i:i + 50])
+        assert len(parser.buffer) < 300
+
+
+def test_non_array_results_are_kept_whole():
+    for doc in ({'id': 0, 'result': {'asks': [1], 'bids': [2]}},
+                {'id': 0, 'error': {'code': 1, 'message': 'result'}},
+                {'id': 0, 'result': []}):
+        document = json.dumps(doc).encode('utf-8')
+        parser, items = feed_all(document, 5)
+        assert items == []
+        if not parser.streamed:
+            assert json.loads(parser.document.decode('utf-8')) == doc
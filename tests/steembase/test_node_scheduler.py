@@ -0,0 +1,82 @@
+from steembase.node_scheduler import NodeScheduler
+
+NODES = ['https://a.test', 'https://b.test', 'https://c.test']
+
+
+def test_prefers_untried_then_fastest():
+    s = NodeScheduler(NODES)
+    assert s.best() == NODES[0]
+
+    s.record_success(NODES[0], 0.5)
+    assert s.best() == NODES[1]
+
+    s.record_success(NODES[1], 0.1)
+    s.record_success(NODES[2], 0.9)
+    assert s.best() == NODES[1]
+
+
+def test_failing_node_is_quarantined():
+    s = NodeScheduler(NODES, quarantine=60)
+    for url, latency in zip(NODES, [0.1, 0.2, 0.3]):
+        s.record_success(url, latency)
+
+    s.record_failure(NODES[0])
+    assert s.best() == NODES[1]
+    assert s.best(exclude=(NODES[1],)) == NODES[2]
+
+    # the error rate decays with every success
+    s.record_success(NODES[0], 0.1)
+    assert s.best() == NODES[1]
+    for _ in range(4):
+        s.record_success(NODES[0], 0.1)
+    assert s.best() == NODES[0]
+
+
+def test_error_rate_counts_without_latency():
+    s = NodeScheduler(NODES[:2], failure_threshold=5)
+    s.record_success(NODES[1], 0.05)
+    for _ in range(4):
+        s.record_failure(NODES[0])
+    assert s.health[NODES[0]].breaker.allow_request()
+    assert s.best() == NODES[1]
+
+    s = NodeScheduler(NODES[:2], latency_prior=0.2)
+    s.record_success(NODES[1], 0.05)
+    assert s.best() == NODES[1]
+
+
+def test_all_quarantined_picks_first_to_recover():
+    s = NodeScheduler(NODES[:2], quarantine=60, quarantine_max=600)
+    s.record_failure(NODES[0])
+    s.record_failure(NODES[0])
+    s.record_failure(NODES[1])
+    assert s.best() == NODES[1]
+
+
+def test_head_block_lag_is_penalized():
+    s = NodeScheduler(NODES[:2])
+    s.record_success(NODES[0], 0.1)
+    s.record_success(NODES[1], 0.3)
+    s.record_head_block(NODES[0], 1000)
+    s.record_head_block(NODES[1], 1010)
+    assert s.best() == NODES[1]
+
+
+def test_circuit_breaker_half_open_probe():
+    s = NodeScheduler(NODES[:2], quarantine=0)
+    s.record_success(NODES[1], 0.5)
+    s.record_failure(NODES[0])
+    assert s.best() == NODES[1]
+
+    # reset timeout expired: exactly one probe is handed out
+    assert s.probes_due() == [NODES[0]]
+    assert s.probes_due() == []
+    assert s.best() == NODES[1]
+
+    # failed probe re-opens the breaker, successful one closes it
+    s.record_failure(NODES[0])
+    assert s.health[NODES[0]].breaker.state == 'open'
+    assert s.probes_due() == [NODES[0]]
+    s.record_success(NODES[0], 0.01)
+    assert s.health[NODES[0]].breaker.state == 'closed'
+    assert s.best() == NODES[0]
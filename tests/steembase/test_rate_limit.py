@@ -0,0 +1,46 @@
+import threading
+import time
+
+from steembase.rate_limit import NodeLimiter
+
+
+def test_rate_limit():
+    limiter = NodeLimiter(rate=50, burst=1)
+    start = time.time()
+    for _ in range(6):
+        with limiter:
+            pass
+    assert time.time() - start >= 0.09
+
+
+def test_max_in_flight():
+    limiter = NodeLimiter(max_in_flight=2)
+    active = []
+    peak = []
+
+    def work():
+        with limiter:
+            active.append(1)
+            peak.append(len(active))
+            time.sleep(0.02)
+            active.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(peak) <= 2
+
+
+def test_adaptive_backoff():
+    limiter = NodeLimiter(rate=40, backoff=0.05)
+    limiter.record_throttled()
+    assert limiter.rate == 20
+    assert limiter.paused_until > time.time()
+    limiter.record_throttled()
+    assert limiter.rate == 10
+
+    for _ in range(100):
+        limiter.record_success()
+    assert limiter.rate == 40
@@ -0,0 +1,38 @@
+from steembase.exceptions import RPCError, RPCErrorRecoverable
+from steembase.retry import RetryPolicy, TokenBucket, RETRY, FAILOVER, RAISE
+
+
+def test_backoff_grows_exponentially_up_to_max():
+    policy = RetryPolicy(backoff_base=0.5, backoff_max=4, jitter=False)
+    assert [policy.backoff(n) for n in range(1, 6)] == [0.5, 1, 2, 4, 4]
+
+
+def test_backoff_jitter_stays_within_bounds():
+    policy = RetryPolicy(backoff_base=1, backoff_max=8)
+    for attempt in range(1, 10):
+        assert 0 <= policy.backoff(attempt) <= 8
+
+
+def test_classify_rules():
+    policy = RetryPolicy(rules=[(RPCErrorRecoverable, RETRY),
+                                (ValueError, RAISE)])
+    assert policy.classify(RPCErrorRecoverable()) == RETRY
+    assert policy.classify(ValueError()) == RAISE
+    assert policy.classify(RPCError()) == FAILOVER
+    assert not policy.allow(1, ValueError())
+
+
+def test_max_retries_and_budget():
+    policy = RetryPolicy(max_retries=3, budget_rate=0, budget_burst=4)
+    error = RPCErrorRecoverable()
+    assert [policy.allow(n, error) for n in (1, 2, 3, 4)] == \
+        [True, True, True, False]
+    assert policy.allow(1, error)
+    assert not policy.allow(1, error)
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=0, capacity=2)
+    assert bucket.consume()
+    assert bucket.consume()
+    assert not bucket.consume()